@@ -0,0 +1,250 @@
+"""
+Bulk operations (delete, unlink, expire, persist, touch, rename, copy) on
+whole folders of keys.
+
+Keys are streamed with SCAN and processed in pipelines of a few hundred
+commands, one step at a time on the I/O thread (bulk tasks: throttled,
+see :class:`~qredis.throttle.Throttle`), so that millions of keys can be
+processed without long blocking commands and the operation can be
+cancelled between steps.
+"""
+
+import logging
+import fnmatch
+import collections
+
+from qtpy.QtCore import QObject, Signal
+
+from .util import glob_escape
+
+
+#: keys per variadic command (UNLINK, TOUCH)
+BATCH = 100
+
+
+def _queue_delete(pipe, keys, arg):
+    # one DEL per key: no single command frees a whole chunk
+    for key in keys:
+        pipe.delete(key)
+
+
+def _queue_unlink(pipe, keys, arg):
+    for i in range(0, len(keys), BATCH):
+        pipe.unlink(*keys[i : i + BATCH])
+
+
+def _queue_expire(pipe, keys, ttl):
+    for key in keys:
+        pipe.expire(key, ttl)
+
+
+def _queue_persist(pipe, keys, arg):
+    for key in keys:
+        pipe.persist(key)
+
+
+def _queue_touch(pipe, keys, arg):
+    for i in range(0, len(keys), BATCH):
+        pipe.touch(*keys[i : i + BATCH])
+
+
+def renamed(key, prefixes):
+    """New name of *key* when its (old, new) *prefixes* are renamed"""
+    old, new = prefixes
+    return new + key[len(old) :]
+
+
+def _queue_rename(pipe, keys, prefixes):
+    # never overwrite an existing key
+    for key in keys:
+        pipe.renamenx(key, renamed(key, prefixes))
+
+
+#: operation: queue the commands of a chunk of keys in a pipeline
+#: (copy has its own, see QRedis.copy_keys)
+OPERATIONS = {
+    "delete": _queue_delete,
+    "unlink": _queue_unlink,
+    "expire": _queue_expire,
+    "persist": _queue_persist,
+    "touch": _queue_touch,
+    "rename": _queue_rename,
+    "copy": None,
+}
+
+#: operations which create keys: all the keys are collected before
+#: the first is processed so that new keys are never scanned
+COLLECT_FIRST = {"rename", "copy"}
+
+
+class BulkOperation(QObject):
+    """
+    Runs *op* (one of :data:`OPERATIONS`) on the given *keys* and on all
+    the keys of the given *folders* (prefixes, split with *splitter* like
+    in the key tree) which match *filter*. *arg* is the TTL (in seconds)
+    of expire, the (old prefix, new prefix) of rename and the
+    ((old prefix, new prefix), target QRedis or None, replace) of copy.
+
+    Each step processes a chunk of at most *chunk* keys and SCANs the next
+    batch. The changes are published through the QRedis signals
+    (keysDeleted, keysChanged, keysRenamed, keysCreated).
+    """
+
+    progress = Signal(int)
+    finished = Signal()
+    error = Signal(object)
+
+    #: SCAN COUNT hint
+    SCAN_COUNT = 1000
+
+    def __init__(
+        self,
+        qredis,
+        op,
+        keys=(),
+        folders=(),
+        splitter=None,
+        filter="*",
+        arg=None,
+        chunk=500,
+        parent=None,
+    ):
+        super().__init__(parent)
+        if op not in OPERATIONS:
+            raise ValueError(f"unknown bulk operation {op!r}")
+        if folders and splitter is None:
+            raise ValueError("need a splitter to find the keys of folders")
+        self.qredis = qredis
+        self.op = op
+        self.arg = arg
+        self.chunk = chunk
+        self.filter = filter
+        self.splitter = splitter
+        self.folders = tuple(folders)
+        #: number of keys processed / which failed (ex: rename target exists)
+        self.done = 0
+        self.failed = 0
+        self._patterns = [glob_escape(folder) + "*" for folder in self.folders]
+        self._cursor = 0
+        self._seen = set(keys)
+        self._queue = collections.deque(self._seen)
+        self._running = False
+        self._group = ("bulk", id(self))
+
+    def is_running(self):
+        return self._running
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._next()
+
+    def cancel(self):
+        """Stop after the commands already sent (which are not undone)"""
+        if not self._running:
+            return
+        self._running = False
+        self.qredis.executor.cancel(self._group)
+        self.finished.emit()
+
+    def _in_folder(self, key):
+        if not fnmatch.fnmatchcase(key, self.filter):
+            return False
+        split = self.splitter.split
+        for folder in self.folders:
+            if key.startswith(folder):
+                depth = len(split(folder))
+                parts = split(key)
+                if len(parts) > depth and "".join(parts[:depth]) == folder:
+                    return True
+        return False
+
+    def _next(self):
+        scanning = bool(self._patterns)
+        collect = self.op in COLLECT_FIRST and scanning
+        if scanning and (collect or len(self._queue) < self.chunk):
+            scan = self._patterns[0], self._cursor
+        else:
+            scan = None
+        if collect:
+            keys = []
+        else:
+            queue = self._queue
+            keys = [queue.popleft() for _ in range(min(self.chunk, len(queue)))]
+        if scan is None and not keys:
+            self._running = False
+            self.finished.emit()
+            return
+        self.qredis.executor.submit(
+            self._step,
+            keys,
+            scan,
+            callback=self._on_step,
+            errback=self._on_error,
+            group=self._group,
+            bulk=True,
+        )
+
+    def _step(self, keys, scan):
+        """Process the *keys* and SCAN the next batch (in the I/O thread)"""
+        failed = self._apply(keys) if keys else 0
+        if scan is None:
+            return len(keys), failed, None
+        pattern, cursor = scan
+        cursor, found = self.qredis.scan_keys(cursor, pattern, self.SCAN_COUNT)
+        return len(keys), failed, (cursor, [k for k in found if self._in_folder(k)])
+
+    def _apply(self, keys):
+        """Run the operation on the *keys*. Returns the number of failures"""
+        qredis, op = self.qredis, self.op
+        if op == "copy":
+            prefixes, target, replace = self.arg
+            pairs = {key: renamed(key, prefixes) for key in keys}
+            reply = qredis.copy_keys(pairs, target, replace)
+        else:
+            pipe = qredis.redis.pipeline(transaction=False)
+            OPERATIONS[op](pipe, keys, self.arg)
+            reply = pipe.execute(raise_on_error=False)
+            qredis.throttle.spend(len(reply))
+        errors = [item for item in reply if isinstance(item, Exception)]
+        if errors:
+            logging.warning("bulk %s: %d errors (ex: %r)", op, len(errors), errors[0])
+        if op == "rename":
+            done = [key for key, ok in zip(keys, reply) if ok is True]
+            qredis.keysRenamed.emit({key: renamed(key, self.arg) for key in done})
+            return len(keys) - len(done)
+        elif op == "copy":
+            done = [pairs[key] for key, ok in zip(keys, reply) if ok is True]
+            (target or qredis).keysCreated.emit(tuple(done))
+            return len(keys) - len(done)
+        elif op in {"delete", "unlink"}:
+            qredis.keysDeleted.emit(tuple(keys))
+        else:
+            qredis.keysChanged.emit(tuple(keys))
+        return len(errors)
+
+    def _on_step(self, result):
+        if not self._running:
+            return
+        nb_keys, failed, scanned = result
+        self.done += nb_keys - failed
+        self.failed += failed
+        if scanned is not None:
+            cursor, keys = scanned
+            seen, queue = self._seen, self._queue
+            for key in keys:
+                if key not in seen:
+                    seen.add(key)
+                    queue.append(key)
+            if cursor == 0:
+                self._patterns.pop(0)
+            self._cursor = cursor
+        self.progress.emit(self.done)
+        self._next()
+
+    def _on_error(self, error):
+        logging.error("error running bulk %s: %r", self.op, error)
+        self._running = False
+        self.error.emit(error)
+        self.finished.emit()
@@ -0,0 +1,403 @@
+"""
+Value codecs: turn the raw bytes stored in redis into something readable.
+
+Codecs are kept in a :class:`CodecRegistry`. Decoding a value goes through:
+
+1. the codec forced for the longest matching key prefix (if any)
+2. the codec which last decoded a key with the same pattern
+3. the registered codecs, in order, skipping the ones whose (cheap)
+   :meth:`Codec.sniff` rules the value out
+
+Example registering extra codecs::
+
+    from qredis.codec import CODECS, JSONCodec
+
+    CODECS.register(JSONCodec(), first=True)
+    CODECS.force("telemetry:", "msgpack")
+"""
+
+import re
+import json
+import logging
+import zlib
+import pickle
+import threading
+import collections
+
+import numpy
+import msgpack
+import msgpack_numpy
+
+
+def msgpack_pack(data):
+    return msgpack.packb(data, use_bin_type=True, default=msgpack_numpy.encode)
+
+
+def msgpack_unpack(buff):
+    return msgpack.unpackb(buff, raw=False, object_hook=msgpack_numpy.decode)
+
+
+def array_summary(array):
+    """Short description of an array (never formats its elements)"""
+    shape = "x".join(str(n) for n in array.shape) or "scalar"
+    return f"<ndarray {array.dtype} {shape}>"
+
+
+def display(obj):
+    """Display string of a decoded python object"""
+    if isinstance(obj, numpy.ndarray) and obj.ndim:
+        return array_summary(obj)
+    return str(obj)
+
+
+class Codec:
+    """
+    Base codec. Sub-classes implement :meth:`loads` and, to skip values
+    which certainly aren't of their format, :meth:`sniff`.
+    """
+
+    name = None
+
+    def sniff(self, data):
+        """False if data cannot be of this format (must be cheap)"""
+        return True
+
+    def loads(self, data):
+        """bytes -> python object. Raises an exception on invalid data"""
+        raise NotImplementedError
+
+    def dumps(self, obj):
+        """python object -> bytes"""
+        raise NotImplementedError
+
+    def format(self, obj):
+        """python object (as returned by :meth:`loads`) -> display string"""
+        return display(obj)
+
+    def decode(self, data):
+        """bytes -> display string"""
+        return self.format(self.loads(data))
+
+
+class UTF8Codec(Codec):
+
+    name = "utf-8"
+
+    def sniff(self, data):
+        # continuation bytes or bytes which never appear in UTF-8
+        return not data or not (0x80 <= data[0] <= 0xC1 or data[0] >= 0xF5)
+
+    def loads(self, data):
+        return data.decode()
+
+    def dumps(self, obj):
+        return obj.encode()
+
+    def format(self, obj):
+        return obj
+
+
+class PickleCodec(Codec):
+
+    name = "pickle"
+
+    def sniff(self, data):
+        # protocol >= 2: PROTO opcode + version ... STOP opcode
+        if len(data) < 3 or data[0] != 0x80:
+            return False
+        return 2 <= data[1] <= 5 and data[-1] == 0x2E
+
+    def loads(self, data):
+        return pickle.loads(data)
+
+    def dumps(self, obj):
+        return pickle.dumps(obj)
+
+
+class MsgpackCodec(Codec):
+
+    name = "msgpack"
+
+    def sniff(self, data):
+        # 1st byte < 0x80 is a single positive fixint: a 1 byte value is
+        # rather text (0xC1 is never used)
+        return bool(data) and data[0] >= 0x80 and data[0] != 0xC1
+
+    def loads(self, data):
+        return msgpack_unpack(data)
+
+    def dumps(self, obj):
+        return msgpack_pack(obj)
+
+
+class JSONCodec(Codec):
+
+    name = "json"
+
+    def sniff(self, data):
+        return data[:1] in {b"{", b"["}
+
+    def loads(self, data):
+        return json.loads(data)
+
+    def dumps(self, obj):
+        return json.dumps(obj).encode()
+
+    def format(self, obj):
+        return json.dumps(obj, indent=2)
+
+
+class CompressedCodec(Codec):
+    """
+    Base for compressed blobs. The decompressed payload is loaded with
+    the registry codecs.
+    """
+
+    magic = ()
+
+    def __init__(self, registry=None):
+        self.registry = registry
+
+    def sniff(self, data):
+        return data[:2] in self.magic
+
+    def decompress(self, data):
+        raise NotImplementedError
+
+    def loads(self, data):
+        registry = CODECS if self.registry is None else self.registry
+        return registry.load(self.decompress(data))[1]
+
+
+class ZlibCodec(CompressedCodec):
+
+    name = "zlib"
+    magic = {b"\x78\x01", b"\x78\x5e", b"\x78\x9c", b"\x78\xda"}
+
+    def decompress(self, data):
+        return zlib.decompress(data)
+
+    def dumps(self, obj):
+        return zlib.compress(obj)
+
+
+class LZ4Codec(CompressedCodec):
+    """LZ4 frame format (needs the optional lz4 package)"""
+
+    name = "lz4"
+
+    def sniff(self, data):
+        return data[:4] == b"\x04\x22\x4d\x18"
+
+    def decompress(self, data):
+        import lz4.frame
+
+        return lz4.frame.decompress(data)
+
+    def dumps(self, obj):
+        import lz4.frame
+
+        return lz4.frame.compress(obj)
+
+
+class ProtobufCodec(Codec):
+    """Decodes values as the given protobuf message class"""
+
+    def __init__(self, message_class, name=None):
+        self.message_class = message_class
+        self.name = name or f"protobuf:{message_class.__name__}"
+
+    def loads(self, data):
+        message = self.message_class()
+        message.ParseFromString(data)
+        return message
+
+    def dumps(self, obj):
+        return obj.SerializeToString()
+
+
+class RawCodec(Codec):
+    """Fallback: python representation of the bytes"""
+
+    name = "raw"
+
+    def loads(self, data):
+        return data
+
+
+_DIGITS = re.compile(r"\d+")
+
+
+def key_pattern(key):
+    """keys differing only by numbers share the same pattern"""
+    return _DIGITS.sub("#", key)
+
+
+class CodecRegistry:
+    """Ordered set of codecs with per key prefix overrides and detection cache"""
+
+    def __init__(self, codecs=(), cache_size=10_000):
+        self.codecs = collections.OrderedDict()
+        self.forced = {}
+        self.cache_size = cache_size
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+        for codec in codecs:
+            self.register(codec)
+
+    def __getitem__(self, name):
+        return self.codecs[name]
+
+    def register(self, codec, first=False):
+        """Add a codec (at the beginning of the detection chain if *first*)"""
+        with self._lock:
+            self.codecs[codec.name] = codec
+            if first:
+                self.codecs.move_to_end(codec.name, last=False)
+            elif "raw" in self.codecs and codec.name != "raw":
+                # raw must remain the last resort
+                self.codecs.move_to_end("raw")
+            self._cache.clear()
+
+    def unregister(self, name):
+        with self._lock:
+            self.codecs.pop(name)
+            self._cache.clear()
+
+    def force(self, prefix, name):
+        """Always decode keys starting with *prefix* with the given codec"""
+        if name not in self.codecs:
+            raise KeyError(f"unknown codec {name!r}")
+        self.forced[prefix] = name
+
+    def unforce(self, prefix):
+        self.forced.pop(prefix, None)
+
+    def _forced(self, key):
+        best = None
+        for prefix, name in self.forced.items():
+            if key.startswith(prefix) and (best is None or len(prefix) > len(best)):
+                best = prefix
+        return None if best is None else self.codecs[self.forced[best]]
+
+    def _cached(self, pattern):
+        with self._lock:
+            name = self._cache.get(pattern)
+            if name is not None:
+                self._cache.move_to_end(pattern)
+        return None if name is None else self.codecs.get(name)
+
+    def _remember(self, pattern, codec):
+        with self._lock:
+            self._cache[pattern] = codec.name
+            self._cache.move_to_end(pattern)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _outranked(self, codec, data):
+        """True if a codec before *codec* in the chain may apply to data"""
+        for other in tuple(self.codecs.values()):
+            if other is codec:
+                return False
+            if other.sniff(data):
+                return True
+        return False
+
+    def _detect(self, data, key, method):
+        pattern = None
+        if key is not None:
+            codec = self._forced(key)
+            if codec is not None:
+                try:
+                    return codec, getattr(codec, method)(data)
+                except Exception as error:
+                    # not what was expected under this prefix: detect it
+                    logging.debug(
+                        "forced codec %s failed on %r: %r", codec.name, key, error
+                    )
+            pattern = key_pattern(key)
+            codec = self._cached(pattern)
+            # the remembered codec must not win over the codecs which come
+            # first in the chain (ex: a digit of a msgpack sibling is text)
+            if (
+                codec is not None
+                and codec.sniff(data)
+                and not self._outranked(codec, data)
+            ):
+                try:
+                    return codec, getattr(codec, method)(data)
+                except Exception:
+                    pass
+        for codec in tuple(self.codecs.values()):
+            if not codec.sniff(data):
+                continue
+            try:
+                result = getattr(codec, method)(data)
+            except Exception:
+                continue
+            if pattern is not None:
+                self._remember(pattern, codec)
+            return codec, result
+        return None, data
+
+    def detect(self, data, key=None):
+        """
+        Returns the codec and the display string for the given data.
+        *key* (the redis key the data belongs to) enables forced codecs and
+        remembering the detection result.
+        """
+        codec, text = self._detect(data, key, "decode")
+        return codec, str(text) if codec is None else text
+
+    def load(self, data, key=None):
+        """Same as :meth:`detect` but returns the python object"""
+        return self._detect(data, key, "loads")
+
+    def decode(self, data, key=None):
+        return self.detect(data, key)[1]
+
+
+def _default_codecs():
+    codecs = [UTF8Codec(), PickleCodec(), MsgpackCodec(), ZlibCodec()]
+    try:
+        import lz4.frame  # noqa: F401
+    except ImportError:
+        pass
+    else:
+        codecs.append(LZ4Codec())
+    codecs.append(RawCodec())
+    return codecs
+
+
+#: default registry
+CODECS = CodecRegistry(_default_codecs())
+
+
+def decode(value, key=None):
+    """Display string of a raw redis value"""
+    if not isinstance(value, bytes):
+        return str(value)
+    return CODECS.decode(value, key)
+
+
+def load(value, key=None):
+    """
+    Like :func:`decode` but numpy arrays are returned as they are
+    (backed by the received buffer) instead of being turned into text
+    """
+    if not isinstance(value, bytes):
+        return str(value)
+    codec, obj = CODECS.load(value, key)
+    if codec is None:
+        return str(obj)
+    if isinstance(obj, numpy.ndarray) and obj.ndim:
+        return obj
+    return codec.format(obj)
+
+
+def register_codec(codec, first=False):
+    CODECS.register(codec, first=first)
+
+
+def force_codec(prefix, name):
+    CODECS.force(prefix, name)
@@ -0,0 +1,83 @@
+"""
+Shared redis connections.
+
+Panels opened on the same server, credentials and db share a single
+:class:`~qredis.redis.QRedis` (and with it its connection pool, I/O
+executor and throttle) instead of opening new connections each time.
+"""
+
+import threading
+import weakref
+
+from .redis import QRedis
+
+
+#: seconds a pooled connection may stay idle before it is checked (PING)
+#: when taken from the pool
+HEALTH_CHECK_INTERVAL = 30
+
+#: connection arguments identifying a connection and their defaults
+KEY_ARGS = (
+    ("host", "localhost"),
+    ("port", 6379),
+    ("unix_socket_path", None),
+    ("db", 0),
+    ("username", None),
+    ("password", None),
+    ("client_name", None),
+)
+
+
+def _close(executor, redis):
+    executor.shutdown()
+    redis.connection_pool.disconnect()
+
+
+def connection_key(kwargs):
+    """Key identifying the connection given by the redis arguments"""
+    key = tuple(kwargs.get(name, default) for name, default in KEY_ARGS)
+    if kwargs.get("unix_socket_path"):
+        key = (None, None) + key[2:]  # host and port are not used
+    return key
+
+
+class ConnectionManager:
+    """
+    Hands out a shared :class:`~qredis.redis.QRedis` per endpoint, auth
+    and db. Connections are created lazily (by the pool, on the first
+    command) and checked when they have been idle for a while. A
+    QRedis is closed when the last panel using it goes away.
+    """
+
+    def __init__(self, health_check_interval=HEALTH_CHECK_INTERVAL):
+        self.health_check_interval = health_check_interval
+        self._lock = threading.Lock()
+        self._redis = weakref.WeakValueDictionary()
+
+    def __len__(self):
+        return len(self._redis)
+
+    def connections(self):
+        """The QRedis in use"""
+        return list(self._redis.values())
+
+    def get(self, **kwargs):
+        """The QRedis of the given connection arguments (created if needed)"""
+        key = connection_key(kwargs)
+        with self._lock:
+            redis = self._redis.get(key)
+            if redis is None:
+                kwargs.setdefault("health_check_interval", self.health_check_interval)
+                redis = QRedis(**kwargs)
+                self._redis[key] = redis
+                weakref.finalize(redis, _close, redis.executor, redis.redis)
+            return redis
+
+
+#: default connection manager
+manager = ConnectionManager()
+
+
+def get_redis(**kwargs):
+    """Shared QRedis of the given connection arguments (see ConnectionManager)"""
+    return manager.get(**kwargs)
@@ -1,8 +1,20 @@
 from qtpy.QtCore import QRegExp
-from qtpy.QtGui import QRegExpValidator
-from qtpy.QtWidgets import QDialog
+from qtpy.QtGui import QRegExpValidator, QIntValidator
+from qtpy.QtWidgets import (
+    QDialog,
+    QCheckBox,
+    QComboBox,
+    QLineEdit,
+    QPushButton,
+    QFormLayout,
+    QHeaderView,
+    QTableWidget,
+    QTableWidgetItem,
+    QDialogButtonBox,
+)
 
-from .redis import QRedis
+from .util import redis_str
+from .connection import get_redis, manager
 from .qutil import ui_loadable
 
 
@@ -48,7 +60,7 @@ class OpenRedisDialog(QDialog):
             filter=self.ui.filter.text(),
             split_by=self.ui.splitter.text(),
         )
-        return QRedis(**kwargs), opts
+        return get_redis(**kwargs), opts
 
     @classmethod
     def create_redis(cls, parent=None):
@@ -57,6 +69,137 @@ class OpenRedisDialog(QDialog):
         return cls.Dialog._create_redis()
 
 
+class CopyDialog(QDialog):
+    """Asks where to copy a key (or folder): open connection and new name"""
+
+    def __init__(self, source, name, parent=None):
+        super(CopyDialog, self).__init__(parent)
+        self.setWindowTitle(f"Copy {name!r} to...")
+        self.target = QComboBox()
+        for redis in manager.connections():
+            self.target.addItem(redis_str(redis)[0], redis)
+        self.target.setCurrentIndex(max(0, self.target.findData(source)))
+        self.name = QLineEdit(name)
+        self.replace = QCheckBox("Overwrite existing keys")
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout = QFormLayout(self)
+        layout.addRow("Database", self.target)
+        layout.addRow("New name", self.name)
+        layout.addRow(self.replace)
+        layout.addRow(buttons)
+
+    @classmethod
+    def get_copy(cls, source, name, parent=None):
+        """(target QRedis, new name, replace) or None if cancelled"""
+        dialog = cls(source, name, parent=parent)
+        if dialog.exec_() != QDialog.Accepted:
+            return None
+        target = dialog.target.currentData()
+        if target is None:
+            target = source
+        return target, dialog.name.text(), dialog.replace.isChecked()
+
+
+class StreamEntryDialog(QDialog):
+    """Asks for the ID and the fields of a new stream entry"""
+
+    def __init__(self, key, fields=(), parent=None):
+        super(StreamEntryDialog, self).__init__(parent)
+        self.setWindowTitle(f"Add entry to {key!r}")
+        self.entry_id = QLineEdit("*")
+        self.entry_id.setToolTip("'*': generated by the server (recommended)")
+        entry_id = QRegExp(r"\*|[0-9]+(-([0-9]+|\*))?")
+        self.entry_id.setValidator(QRegExpValidator(entry_id))
+        self.fields = QTableWidget(0, 2)
+        self.fields.setHorizontalHeaderLabels(("Field", "Value"))
+        self.fields.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.fields.verticalHeader().setVisible(False)
+        for field, value in fields or [("", "")]:
+            self.add_field(field, value)
+        add = QPushButton("Add field")
+        add.clicked.connect(lambda: self.add_field())
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout = QFormLayout(self)
+        layout.addRow("ID", self.entry_id)
+        layout.addRow(self.fields)
+        layout.addRow(add)
+        layout.addRow(buttons)
+
+    def add_field(self, field="", value=""):
+        row = self.fields.rowCount()
+        self.fields.insertRow(row)
+        self.fields.setItem(row, 0, QTableWidgetItem(field))
+        self.fields.setItem(row, 1, QTableWidgetItem(value))
+
+    @classmethod
+    def get_entry(cls, key, fields=(), parent=None):
+        """
+        (ID, {field: value}) of the new entry or None if cancelled (or
+        without fields). *fields* are the (field, value) proposed
+        """
+        dialog = cls(key, fields, parent=parent)
+        if dialog.exec_() != QDialog.Accepted:
+            return None
+        table = dialog.fields
+        fields = {}
+        for row in range(table.rowCount()):
+            field = table.item(row, 0).text()
+            if field:
+                fields[field] = table.item(row, 1).text()
+        if not fields:
+            return None
+        return dialog.entry_id.text() or "*", fields
+
+
+class TrimDialog(QDialog):
+    """Asks how to trim a stream (XTRIM)"""
+
+    def __init__(self, key, length, parent=None):
+        super(TrimDialog, self).__init__(parent)
+        self.setWindowTitle(f"Trim {key!r}")
+        self.strategy = QComboBox()
+        self.strategy.addItem("Keep the newest entries (MAXLEN)", "maxlen")
+        self.strategy.addItem("Keep the entries from ID (MINID)", "minid")
+        self.strategy.currentIndexChanged.connect(self.__on_strategy_changed)
+        self.threshold = QLineEdit(str(length))
+        self.approximate = QCheckBox("Approximate (~): cheaper, may keep a few more")
+        self.approximate.setChecked(True)
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout = QFormLayout(self)
+        layout.addRow("Strategy", self.strategy)
+        layout.addRow("Threshold", self.threshold)
+        layout.addRow(self.approximate)
+        layout.addRow(buttons)
+        self.__on_strategy_changed()
+
+    def __on_strategy_changed(self, *_):
+        if self.strategy.currentData() == "maxlen":
+            validator = QIntValidator()
+            validator.setBottom(0)
+        else:
+            validator = QRegExpValidator(QRegExp(r"[0-9]+(-[0-9]+)?"))
+        self.threshold.setValidator(validator)
+
+    @classmethod
+    def get_trim(cls, key, length, parent=None):
+        """keyword arguments of QRedis.xtrim or None if cancelled"""
+        dialog = cls(key, length, parent=parent)
+        if dialog.exec_() != QDialog.Accepted:
+            return None
+        if not dialog.threshold.hasAcceptableInput():
+            return None
+        strategy, threshold = dialog.strategy.currentData(), dialog.threshold.text()
+        if strategy == "maxlen":
+            threshold = int(threshold)
+        return {strategy: threshold, "approximate": dialog.approximate.isChecked()}
+
+
 class AboutDialog(QDialog):
     """Create the necessary elements to show helpful text in a dialog."""
 
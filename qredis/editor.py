@@ -1,9 +1,9 @@
 import logging
 from datetime import timedelta
 from functools import partial
-from collections import OrderedDict
 
-from qtpy.QtCore import Qt
+import numpy
+from qtpy.QtCore import Qt, QSignalBlocker, Signal
 from qtpy.QtGui import QIntValidator
 from qtpy.QtWidgets import (
     QWidget,
@@ -11,15 +11,34 @@ from qtpy.QtWidgets import (
     QLabel,
     QStackedLayout,
     QMessageBox,
+    QProgressBar,
     QTableWidgetItem,
     QTreeWidgetItem,
 )
 
 from .util import redis_str
 from .qutil import ui_loadable
+from .dialog import StreamEntryDialog, TrimDialog
+from .redis import Pager, CollectionEdit
+from .memory import MemoryPanel
+from .table import ArrayModel, CollectionModel, StreamModel
+from .tail import StreamTail
 
 ModifiedStyle = "background-color: rgb(255,200,200);"
 
+#: type: (table header, column types) of the collections (default: values)
+COLUMNS = {
+    "hash": (("Key", "Value"), None),
+    "zset": (("Member", "Score"), (None, float)),
+}
+
+
+def _set_ttl(redis, key, ttl):
+    if ttl > 0:
+        redis.expire(key, ttl)
+    else:
+        redis.persist(key)
+
 
 @ui_loadable
 class MultiEditor(QWidget):
@@ -28,40 +47,38 @@ class MultiEditor(QWidget):
         self.load_ui()
         self.modified = False
         self.item = None
-        self.ui.table.itemSelectionChanged.connect(self.__update)
-        self.ui.table.itemChanged.connect(self.__on_item_changed)
+        self.model = CollectionModel(parent=self)
+        self.model.edited.connect(self.__on_item_changed)
+        self.model.rowsLoaded.connect(self.__update_count)
+        self.ui.table.setModel(self.model)
+        selection = self.ui.table.selectionModel()
+        selection.selectionChanged.connect(self.__update)
         self.ui.add_button.clicked.connect(self.__on_add_item)
         self.ui.delete_button.clicked.connect(self.__on_delete_selection)
         self.ui.revert_button.clicked.connect(self.__on_revert_changes)
 
-    def __on_item_changed(self, item):
+    def __on_item_changed(self):
         self.modified = True
         self.__update()
+        self.__update_count()
 
     def __on_revert_changes(self):
         self.set_item(self.item)
 
     def __on_add_item(self):
-        table = self.ui.table
+        table, model = self.ui.table, self.model
         items = table.selectedIndexes()
         if items:
             row = max([item.row() for item in items])
         else:
-            row = table.rowCount()
-        table.insertRow(row)
-        key_item = QTableWidgetItem()
-        table.setItem(row, 0, key_item)
-        table.editItem(key_item)
-        self.modified = True
-        self.__update()
+            row = model.rowCount()
+        model.insertRows(row, 1)
+        table.edit(model.index(row, 0))
 
     def __on_delete_selection(self):
-        table = self.ui.table
-        rows = set([item.row() for item in table.selectedIndexes()])
+        rows = set([item.row() for item in self.ui.table.selectedIndexes()])
         for row in sorted(rows, reverse=True):
-            table.removeRow(row)
-        self.modified = True
-        self.__update()
+            self.model.removeRows(row, 1)
 
     def __update(self):
         ui, modified = self.ui, self.modified
@@ -71,31 +88,21 @@ class MultiEditor(QWidget):
         ui.revert_button.setEnabled(modified)
         ui.delete_button.setEnabled(selected_count > 0)
 
+    def __update_count(self):
+        model = self.model
+        self.ui.count_label.setText(f"{model.rowCount()}/{model.length}")
+
     def get_item(self):
-        table, item = self.ui.table, self.item
-        if item.type in {"hash", "zset"}:
-            value = {}
-            for row in range(table.rowCount()):
-                value[table.item(row, 0).text()] = table.item(row, 1).text()
-        else:
-            value = [table.item(row, 0).text() for row in range(table.rowCount())]
-            value = value if item.type == "list" else set(value)
-        return item._replace(value=value)
+        """The item with the changes made (only those are written back)"""
+        item = self.item
+        return item._replace(value=self.model.edit(item.type))
 
     def set_item(self, item):
         self.item = item
-        table = self.ui.table
-        table.clearContents()
-        dtype, value = item.type, item.value
-        table.setRowCount(len(value))
-        header = ("Key", "Value") if dtype in {"hash", "zset"} else ("Value",)
-        table.setColumnCount(len(header))
-        table.setHorizontalHeaderLabels(header)
-        for row, key in enumerate(value):
-            table.setItem(row, 0, QTableWidgetItem(key))
-        if item.type in {"hash", "zset"}:
-            for row, (key, data) in enumerate(value.items()):
-                table.setItem(row, 1, QTableWidgetItem(data))
+        header, types = COLUMNS.get(item.type, (("Value",), None))
+        if header != self.model.header:
+            self.model.set_header(header, types)
+        self.model.set_value(item.value)
         self.modified = False
         self.__update()
 
@@ -169,6 +176,7 @@ class RedisItemEditor(QWidget):
         self.hash_editor = MultiEditor()
         self.seq_editor = MultiEditor()
         self.stream_viewer = StreamViewer()
+        self.array_viewer = ArrayViewer()
         self.seq_editor.ui.table.horizontalHeader().setVisible(False)
         self.set_editor = MultiEditor()
         self.set_editor.ui.table.horizontalHeader().setVisible(False)
@@ -178,6 +186,8 @@ class RedisItemEditor(QWidget):
         layout.addWidget(self.seq_editor)
         layout.addWidget(self.set_editor)
         layout.addWidget(self.stream_viewer)
+        layout.addWidget(self.array_viewer)
+        self.stream_viewer.changed.connect(self.__on_refresh)
         self.type_editor_map = {
             "none": self.none_editor,
             "string": self.simple_editor,
@@ -187,6 +197,13 @@ class RedisItemEditor(QWidget):
             "zset": self.hash_editor,
             "stream": self.stream_viewer,
         }
+        # progress of the write of a big value (see QRedis.write_value)
+        ui.write_progress = QProgressBar()
+        ui.write_progress.setMaximumWidth(200)
+        ui.write_progress.setVisible(False)
+        buttons = ui.widget.layout()
+        buttons.insertWidget(buttons.indexOf(ui.delete_button) - 1, ui.write_progress)
+        self.__writing = None
         ttl_validator = QIntValidator()
         ttl_validator.setBottom(-1)
         ui.ttl_value.setValidator(ttl_validator)
@@ -208,16 +225,80 @@ class RedisItemEditor(QWidget):
         self.ui.delete_button.setEnabled(enabled)
         self.ui.touch_button.setEnabled(enabled)
 
+    @staticmethod
+    def __apply(original_item, item):
+        redis = item.redis
+        if original_item.key and original_item.key != item.key:
+            redis.rename(original_item.key, item.key)
+        redis[item.key] = item.value
+        if original_item.ttl != item.ttl:
+            _set_ttl(redis, item.key, item.ttl)
+        if isinstance(item.value, CollectionEdit):
+            # show what is in redis now (others may have changed it too)
+            return redis.get(item.key, dtype=item.type, meta=True, paged=True)
+        return item
+
     def __on_apply(self):
         editor = self.ui.type_editor.layout().currentWidget()
         item = editor.get_item()
-        item = self.__item._replace(value=item.value, ttl=item.ttl)
-        if self.__original_item.key:
-            self.__on_key_name_applied()
-        item.redis[item.key] = item.value
-        self.__on_ttl_applied()
-        self.set_item(item)
-        self.__update()
+        item = self.__item._replace(value=item.value)
+        self.__end_write()
+        self.__writing = item.redis, item.key
+        item.redis.writeProgress.connect(self.__on_write_progress)
+        original_item = self.__original_item
+        # no group: a write is never superseded (ex: by the load of another key)
+        item.redis.executor.submit(
+            self.__apply,
+            original_item,
+            item,
+            callback=partial(self.__on_applied, original_item, item),
+            errback=partial(self.__on_apply_error, item),
+        )
+
+    def __shows(self, item):
+        """True if the key of *item* is (still) the one being edited"""
+        current = self.__original_item
+        return (
+            current is not None
+            and current.redis is item.redis
+            and current.key == item.key
+        )
+
+    def __on_applied(self, original_item, item, result):
+        self.__end_write(item)
+        if self.__shows(original_item):
+            self.set_item(result)
+
+    def __on_write_progress(self, key, done, total):
+        if self.__writing is None or key != self.__writing[1]:
+            return
+        if self.__item is None or self.__item.key != key:
+            return
+        progress = self.ui.write_progress
+        progress.setMaximum(total)
+        progress.setValue(done)
+        progress.setFormat("writing %p%")
+        progress.setVisible(True)
+
+    def __end_write(self, item=None):
+        """Stop showing the progress of the last write (or of the write of
+        *item* if it is still the last one)"""
+        writing = self.__writing
+        if writing is None:
+            return
+        if item is not None and writing != (item.redis, item.key):
+            return
+        writing[0].writeProgress.disconnect(self.__on_write_progress)
+        self.__writing = None
+        self.ui.write_progress.setVisible(False)
+
+    def __on_apply_error(self, item, error):
+        self.__end_write(item)
+        logging.error("error applying changes to %r", item.key, exc_info=error)
+        QMessageBox.warning(self, "Error applying changes", f"{item.key}: {error}")
+
+    def __on_error(self, name, error):
+        logging.error("error on %s callback", name, exc_info=error)
 
     def __on_key_name_changed(self, key):
         self.__item = self.__item._replace(key=key)
@@ -226,13 +307,18 @@ class RedisItemEditor(QWidget):
     def __on_key_name_applied(self):
         if self.name_modified:
             item, original_item = self.__item, self.__original_item
-            try:
-                if original_item.key:
-                    item.redis.rename(original_item.key, item.key)
-                    self.__original_item = original_item._replace(key=item.key)
-            except Exception:
-                logging.exception("error on key name applied callback")
-            self.__update()
+            if original_item.key:
+                item.redis.executor.submit(
+                    item.redis.rename,
+                    original_item.key,
+                    item.key,
+                    callback=partial(self.__on_key_name_renamed, item.key),
+                    errback=partial(self.__on_error, "key name applied"),
+                )
+
+    def __on_key_name_renamed(self, key, _):
+        self.__original_item = self.__original_item._replace(key=key)
+        self.__update()
 
     def __on_ttl_changed(self, ttl):
         ttl = int(ttl) if ttl else -1
@@ -241,37 +327,45 @@ class RedisItemEditor(QWidget):
 
     def __on_ttl_applied(self):
         if self.ttl_modified:
-            item, original_item = self.__item, self.__original_item
-            try:
-                item.redis.expire(item.key, item.ttl)
-                self.__original_item = original_item._replace(ttl=item.ttl)
-            except Exception:
-                logging.exception("error on ttl applied callback")
-            self.__update()
+            item = self.__item
+            item.redis.executor.submit(
+                _set_ttl,
+                item.redis,
+                item.key,
+                item.ttl,
+                callback=partial(self.__on_ttl_set, item.ttl),
+                errback=partial(self.__on_error, "ttl applied"),
+            )
+
+    def __on_ttl_set(self, ttl, _):
+        self.__original_item = self.__original_item._replace(ttl=ttl)
+        self.__update()
 
     def __on_refresh(self):
         item = self.__original_item
-        if item is not None:
-            try:
-                item = item.redis[item.key]
-            except KeyError:
-                item = None
-        self.set_item(item)
+        if item is None:
+            self.set_item(item)
+        else:
+            self.load_item(item.redis, item.key, item.type)
 
     def __on_undo(self):
         self.set_item(self.__original_item)
 
     def __on_persist(self):
-        try:
-            self.__original_item.redis.persist(self.__item.key)
-        except Exception:
-            logging.exception("error on persist applied callback")
+        redis = self.__original_item.redis
+        redis.executor.submit(
+            redis.persist,
+            self.__item.key,
+            errback=partial(self.__on_error, "persist applied"),
+        )
 
     def __on_delete(self):
-        try:
-            self.__original_item.redis.delete(self.__item.key)
-        except Exception:
-            logging.exception("error on delete applied callback")
+        redis = self.__original_item.redis
+        redis.executor.submit(
+            redis.delete,
+            self.__item.key,
+            errback=partial(self.__on_error, "delete applied"),
+        )
 
     def __update(self):
         ui = self.ui
@@ -293,12 +387,35 @@ class RedisItemEditor(QWidget):
     def ttl_modified(self):
         return self.__item.ttl != self.__original_item.ttl
 
+    def load_item(self, redis, key, dtype=None):
+        """Fetch the key in the background and display it when ready"""
+        redis.executor.submit(
+            redis.get,
+            key,
+            dtype=dtype,
+            meta=True,
+            paged=True,
+            callback=self.set_item,
+            errback=partial(self.__on_error, "load item"),
+            group=self.load_group,
+        )
+
+    @property
+    def load_group(self):
+        """executor group of the key loads (a new load supersedes the last)"""
+        return (self, "load")
+
     def set_item(self, item):
+        # a write still running (of another key) keeps going in background
+        self.ui.write_progress.setVisible(False)
         if item is None:
             editor = self.none_editor
             ttl = -1
         else:
-            editor = self.type_editor_map[item.type]
+            if isinstance(item.value, numpy.ndarray):
+                editor = self.array_viewer
+            else:
+                editor = self.type_editor_map[item.type]
             editor.set_item(item)
             ttl = item.ttl
         self.__original_item = self.__item = item
@@ -308,7 +425,13 @@ class RedisItemEditor(QWidget):
         self.ui.key_name.setText(item.key)
         self.ui.ttl_value.setText(str(ttl) if ttl > 0 else "")
         self.ui.type_label_value.setText(item.type)
-        if item.type == 'stream':
+        details = []
+        if item.encoding is not None:
+            details.append(f"encoding: {item.encoding}")
+        if item.memory is not None:
+            details.append(f"memory: {item.memory} bytes")
+        self.ui.type_label_value.setToolTip("\n".join(details))
+        if item.type == 'stream' or editor is self.array_viewer:
             self.__enabled_buttons(False)
         else:
             self.__enabled_buttons(True)
@@ -330,10 +453,21 @@ class RedisDbEditor(QMainWindow):
             partial(self.__on_filter_changed, ui.config_table)
         )
         ui.config_table.itemChanged.connect(self.__on_config_changed)
+        self.memory = MemoryPanel()
+        ui.tabWidget.addTab(self.memory, "Memory")
 
     def __on_refresh(self):
         self.set_db(self._redis)
 
+    @staticmethod
+    def __fetch_db(redis):
+        return dict(
+            info=redis.info(),
+            config=redis.config_get(),
+            clients=redis.client_list(),
+            name=redis_str(redis),
+        )
+
     def __on_filter_changed(self, table, text):
         if text:
 
@@ -369,12 +503,23 @@ class RedisDbEditor(QMainWindow):
             table.blockSignals(False)
             QMessageBox.warning(self, "Error changing config", repr(error))
 
-    def set_db(self, redis):
+    def set_db(self, redis, splitter=None):
         self._redis = redis
-        info = self._redis.info()
-        config = self._redis.config_get()
-        clients = self._redis.client_list()
-        name, tooltip = redis_str(redis)
+        self.memory.set_redis(redis, splitter)
+        redis.executor.submit(
+            self.__fetch_db,
+            redis,
+            callback=self.__on_db_fetched,
+            errback=self.__on_db_error,
+            group=self,
+        )
+
+    def __on_db_error(self, error):
+        logging.error("error fetching db information", exc_info=error)
+
+    def __on_db_fetched(self, data):
+        info, config, clients = data["info"], data["config"], data["clients"]
+        name, tooltip = data["name"]
         name = "{} (v{})".format(name, info["redis_version"])
         self.ui.name_label.setText(name)
         self.ui.name_label.setToolTip(tooltip)
@@ -419,24 +564,55 @@ class RedisDbEditor(QMainWindow):
 
 @ui_loadable()
 class StreamViewer(QWidget):
+    """
+    Entries of a stream (fetched page by page) and its consumer groups
+    (fetched when their tab is shown). Entries are added, deleted and
+    trimmed right away (XADD, XDEL, XTRIM).
+
+    In live mode the new entries are followed (see
+    :class:`~qredis.tail.StreamTail`) and only the last *TailCap* are
+    kept.
+    """
+
+    #: the stream was changed (it has to be reloaded)
+    changed = Signal()
+
+    #: max number of entries shown in live mode
+    TailCap = 10_000
+
     def __init__(self, parent=None):
         super(StreamViewer, self).__init__(parent)
         self.load_ui()
         self.modified = False
         self.item = None
-        self._events = None
+        self.tail = None
+        self._groups = None
+        ui = self.ui
         header = ("Key", "Value")
-        self.ui.table.setColumnCount(len(header))
-        self.ui.table.setHorizontalHeaderLabels(header)
-        self.ui.list.itemSelectionChanged.connect(self.select_item)
+        ui.table.setColumnCount(len(header))
+        ui.table.setHorizontalHeaderLabels(header)
+        self.model = StreamModel(parent=self)
+        self.model.rowsLoaded.connect(self.__update_count)
+        ui.list.setModel(self.model)
+        ui.list.setUniformItemSizes(True)
+        ui.list.selectionModel().selectionChanged.connect(self.select_item)
+        ui.add_button.clicked.connect(self.__on_add)
+        ui.delete_button.clicked.connect(self.__on_delete)
+        ui.trim_button.clicked.connect(self.__on_trim)
+        ui.tail_button.toggled.connect(self.__on_tail_toggled)
+        ui.pause_button.toggled.connect(self.__on_pause_toggled)
+        ui.tabs.currentChanged.connect(self.__fetch_groups_if_needed)
+
+    def __selected_rows(self):
+        return sorted(i.row() for i in self.ui.list.selectionModel().selectedRows())
 
     def select_item(self):
-        items = self.ui.list.selectedItems()
+        rows = self.__selected_rows()
+        self.ui.delete_button.setEnabled(bool(rows))
         self.ui.table.clearContents()
-        if not items:
+        if not rows:
             return
-        item = items[0]
-        data = self._events[item.text()]
+        data = self.model.entry(rows[0])[1]
         self.ui.table.setRowCount(len(data))
         for row, (key, value) in enumerate(data.items()):
             self.ui.table.setItem(row, 0, QTableWidgetItem(key))
@@ -446,16 +622,209 @@ class StreamViewer(QWidget):
     def get_item(self):
         return self.item
 
+    def __length(self):
+        pager = self.model.pager
+        return self.model.rowCount() if pager is None else pager.length
+
+    def __update_count(self):
+        self.ui.count_label.setText(f"{self.model.rowCount()}/{self.__length()}")
+
+    def __append_events(self, events):
+        self.model.append(events)
+        self.__update_count()
+
+    def __submit(self, name, func, *args, **kwargs):
+        self.item.redis.executor.submit(
+            func,
+            *args,
+            callback=lambda _: self.__on_changed(),
+            errback=partial(self.__on_error, name),
+            **kwargs,
+        )
+
+    def __on_changed(self):
+        # in live mode new entries show up by themselves
+        if self.tail is None:
+            self.changed.emit()
+
+    def __on_add(self):
+        # propose the fields of the selected entry
+        rows = self.__selected_rows()
+        fields = self.model.entry(rows[0])[1].items() if rows else ()
+        key = self.item.key
+        entry = StreamEntryDialog.get_entry(key, fields, parent=self)
+        if entry is not None:
+            entry_id, fields = entry
+            self.__submit("add entry", self.item.redis.xadd, key, fields, id=entry_id)
+
+    def __on_delete(self):
+        ids = [self.model.entry(row)[0] for row in self.__selected_rows()]
+        if ids:
+            if self.tail is not None:
+                self.model.remove(ids)
+            self.__submit("delete entries", self.item.redis.xdel, self.item.key, *ids)
+
+    def __on_trim(self):
+        key = self.item.key
+        trim = TrimDialog.get_trim(key, self.__length(), parent=self)
+        if trim is not None:
+            self.__submit("trim", self.item.redis.xtrim, key, **trim)
+
+    def __on_error(self, name, error):
+        logging.error("error on stream %s", name, exc_info=error)
+        QMessageBox.warning(self, f"Error on stream {name}", str(error))
+
+    def __on_tail_toggled(self, live):
+        if live:
+            self.start_tail()
+        else:
+            self.stop_tail()
+
+    def __on_pause_toggled(self, paused):
+        if self.tail is not None:
+            self.tail.pause(paused)
+
+    def start_tail(self):
+        """Follow the new entries (live mode)"""
+        if self.tail is not None or self.item is None:
+            return
+        self.model.clear()
+        self.model.set_cap(self.TailCap)
+        self.tail = StreamTail(self.item.redis, self.item.key, cap=self.TailCap)
+        self.tail.entriesAdded.connect(self.__on_tail_entries)
+        self.tail.statsChanged.connect(self.__on_tail_stats)
+        self.tail.error.connect(partial(self.__on_error, "live"))
+        self.tail.error.connect(self.stop_tail)
+        self.tail.start()
+        ui = self.ui
+        ui.pause_button.setEnabled(True)
+        with QSignalBlocker(ui.tail_button):
+            ui.tail_button.setChecked(True)
+
+    def stop_tail(self):
+        if self.tail is None:
+            return
+        self.tail.stop()
+        self.tail.deleteLater()
+        self.tail = None
+        self.model.set_cap(None)
+        ui = self.ui
+        ui.tail_label.setText("")
+        ui.pause_button.setEnabled(False)
+        for button in (ui.tail_button, ui.pause_button):
+            with QSignalBlocker(button):
+                button.setChecked(False)
+
+    def __on_tail_entries(self, entries):
+        bar = self.ui.list.verticalScrollBar()
+        at_bottom = bar.value() == bar.maximum()
+        self.__append_events(entries)
+        if at_bottom:
+            self.ui.list.scrollToBottom()
+
+    def __on_tail_stats(self, stats):
+        text = f"{stats.rate:.0f}/s, {stats.received} received"
+        if stats.dropped:
+            text += f", {stats.dropped} dropped"
+        self.ui.tail_label.setText(text)
+
+    def hideEvent(self, event):
+        # not shown anymore (another key is shown): stop following
+        if not event.spontaneous():
+            self.stop_tail()
+        super(StreamViewer, self).hideEvent(event)
+
+    def __fetch_groups_if_needed(self, *_):
+        if self.item is None or self._groups is not None:
+            return
+        if self.ui.tabs.currentWidget() is not self.ui.groups_tab:
+            return
+        self._groups = []
+        self.item.redis.executor.submit(
+            self.item.redis.stream_groups,
+            self.item.key,
+            callback=self.__on_groups,
+            errback=partial(self.__on_error, "groups"),
+            group=(self, "groups"),
+        )
+
+    def __on_groups(self, groups):
+        self._groups = groups
+        tree = self.ui.groups
+        tree.clear()
+        for group in groups:
+            columns = [group.name, str(group.pending), group.last_id]
+            node = QTreeWidgetItem(tree, columns)
+            if group.pending:
+                pending = f"pending: {group.first_pending} .. {group.last_pending}"
+                node.setToolTip(1, pending)
+            for consumer in group.consumers:
+                idle = f"idle {timedelta(milliseconds=consumer.idle)}"
+                QTreeWidgetItem(node, [consumer.name, str(consumer.pending), idle])
+        tree.expandAll()
+        tree.resizeColumnToContents(0)
+
     def set_item(self, item):
+        self.stop_tail()
         self.item = item
-        self.ui.list.clear()
         self.ui.table.clearContents()
-        self._events = OrderedDict()
+        self.ui.groups.clear()
+        self._groups = None
+        if isinstance(item.value, Pager):
+            pager, events = item.value.first_page()
+        else:
+            pager, events = None, item.value
+        self.model.set_entries(events, pager)
+        self.__update_count()
+        self.ui.list.setCurrentIndex(self.model.index(0))
+        self.__fetch_groups_if_needed()
+
+
+def array_stats(array):
+    """Summary statistics of a numeric array (vectorized, NaNs ignored)"""
+    kind = array.dtype.kind
+    if not array.size or kind not in "biuf":
+        return {}
+    stats = {}
+    funcs = numpy.min, numpy.max, numpy.mean, numpy.std
+    if kind == "f":
+        stats["NaN"] = nans = int(numpy.count_nonzero(numpy.isnan(array)))
+        if nans == array.size:
+            return stats
+        if nans:
+            funcs = numpy.nanmin, numpy.nanmax, numpy.nanmean, numpy.nanstd
+    for name, func in zip(("min", "max", "mean", "std"), funcs):
+        stats[name] = func(array)
+    return stats
+
+
+@ui_loadable
+class ArrayViewer(QWidget):
+    """Read-only viewer of a numpy array value"""
+
+    def __init__(self, parent=None):
+        super(ArrayViewer, self).__init__(parent)
+        self.load_ui()
+        self.modified = False
+        self.item = None
+        self.model = ArrayModel(self)
+        self.ui.table.setModel(self.model)
 
-        for event in item.value:
-            self._events[event[0]] = event[1]
-            self.ui.list.addItem(event[0])
-        self.ui.list.setCurrentRow(0)
+    def get_item(self):
+        return self.item
+
+    def set_item(self, item):
+        self.item = item
+        array = item.value
+        ui = self.ui
+        ui.shape_value.setText(" x ".join(str(n) for n in array.shape))
+        ui.dtype_value.setText(str(array.dtype))
+        ui.size_value.setText(f"{array.nbytes} bytes")
+        stats = array_stats(array)
+        ui.stats_value.setText(
+            "\n".join(f"{name}: {value:.6g}" for name, value in stats.items())
+        )
+        self.model.set_array(array)
 
 
 class RedisEditor(QWidget):
@@ -477,7 +846,11 @@ class RedisEditor(QWidget):
         self.layout().setCurrentWidget(self.item)
         self.item.set_item(item)
 
-    def set_db(self, redis):
+    def load_item(self, redis, key, dtype=None):
+        self.layout().setCurrentWidget(self.item)
+        self.item.load_item(redis, key, dtype)
+
+    def set_db(self, redis, splitter=None):
         self.layout().setCurrentWidget(self.db)
-        self.db.set_db(redis)
+        self.db.set_db(redis, splitter)
         
\ No newline at end of file
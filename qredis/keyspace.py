@@ -0,0 +1,148 @@
+"""Redis keyspace notifications listener"""
+
+import logging
+import threading
+
+from redis import ResponseError
+from qtpy.QtCore import QObject, QTimer, Signal
+
+
+#: events after which the key no longer exists
+REMOVE_EVENTS = {"del", "expired", "evicted", "rename_from", "move_from"}
+
+#: notify-keyspace-events flags needed: keyspace channel, all event classes
+NOTIFY_FLAGS = "KA"
+
+
+def notify_flags(qredis):
+    """
+    Current notify-keyspace-events of the server and the flags missing
+    for a :class:`KeyspaceWatcher`. Raises RuntimeError if they can't be
+    read (CONFIG disabled or renamed)
+    """
+    try:
+        config = qredis.redis.config_get("notify-keyspace-events")
+    except ResponseError as error:
+        raise RuntimeError(
+            f"cannot read the server notify-keyspace-events ({error}): "
+            f"keyspace notifications ({NOTIFY_FLAGS!r}) must be enabled on the "
+            "server for live mode"
+        ) from error
+    flags = config.get("notify-keyspace-events", "")
+    return flags, "".join(flag for flag in NOTIFY_FLAGS if flag not in flags)
+
+
+def enable_notifications(qredis, flags, missing):
+    """
+    CONFIG SET notify-keyspace-events: a server wide change, affecting
+    all its clients, which must be approved by the user
+    """
+    logging.info("enabling redis keyspace notifications (%s)", missing)
+    qredis.redis.config_set("notify-keyspace-events", flags + missing)
+
+
+class KeyspaceWatcher(QObject):
+    """
+    Listens to the keyspace notifications of the keys matching *pattern*
+    on a dedicated connection and thread.
+
+    Events are coalesced (only the last event of each key is kept) and
+    delivered in the GUI thread through *keysChanged* at most every
+    *interval* ms, so that bursts of thousands of events per second
+    result in a few batches. When more than *max_pending* keys change
+    between two batches *overflow* is emitted instead (a full reload is
+    cheaper than applying the batch).
+
+    The server must have keyspace notifications enabled (see
+    :func:`notify_flags` and :func:`enable_notifications`), otherwise
+    *error* is emitted.
+    """
+
+    keysChanged = Signal(object)
+    overflow = Signal()
+    error = Signal(object)
+
+    def __init__(self, qredis, pattern="*", interval=200, max_pending=10_000):
+        super().__init__(qredis)
+        self.qredis = qredis
+        self.pattern = pattern
+        self.max_pending = max_pending
+        db = qredis.connection_pool.connection_kwargs.get("db", 0)
+        self.channel_prefix = f"__keyspace@{db}__:"
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._overflow = False
+        self._thread = None
+        self._stop = None
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self._flush)
+        self.error.connect(self.stop)
+
+    def is_running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(self._stop,), name="redis-keyspace", daemon=True
+        )
+        self._thread.start()
+        self._timer.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread = None
+        self._timer.stop()
+        with self._lock:
+            self._pending = {}
+            self._overflow = False
+
+    def _run(self, stop):
+        pubsub = None
+        try:
+            _, missing = notify_flags(self.qredis)
+            if missing:
+                raise RuntimeError(
+                    f"keyspace notifications are disabled on the server "
+                    f"(notify-keyspace-events lacks {missing!r})"
+                )
+            pubsub = self.qredis.redis.pubsub(ignore_subscribe_messages=True)
+            pubsub.psubscribe(self.channel_prefix + self.pattern)
+            start = len(self.channel_prefix)
+            while not stop.is_set():
+                message = pubsub.get_message(timeout=0.5)
+                if message is not None:
+                    key = message["channel"][start:].decode()
+                    self._push(key, message["data"].decode())
+        except Exception as error:
+            if not stop.is_set():
+                logging.error("keyspace notifications stopped: %r", error)
+                self.error.emit(error)
+        finally:
+            if pubsub is not None:
+                pubsub.close()
+
+    def _push(self, key, event):
+        with self._lock:
+            if self._overflow:
+                return
+            pending = self._pending
+            pending.pop(key, None)  # keep keys in order of their last event
+            pending[key] = event
+            if len(pending) > self.max_pending:
+                self._pending = {}
+                self._overflow = True
+
+    def _flush(self):
+        with self._lock:
+            pending, overflow = self._pending, self._overflow
+            self._pending, self._overflow = {}, False
+        if overflow:
+            self.overflow.emit()
+        elif pending:
+            self.keysChanged.emit(pending)
@@ -0,0 +1,550 @@
+"""
+Memory usage analyzer ("big keys" report).
+
+Walks the keyspace with SCAN and pipelined MEMORY USAGE / TYPE / length
+commands (see :meth:`~qredis.redis.QRedis.memory_stats`) and aggregates
+the memory per key folder, per type and keeps the biggest keys.
+"""
+
+import heapq
+import bisect
+import logging
+
+from qtpy.QtCore import (
+    Qt,
+    Signal,
+    QEvent,
+    QObject,
+    QTimer,
+    QModelIndex,
+    QAbstractItemModel,
+    QRectF,
+    QSortFilterProxyModel,
+)
+from qtpy.QtGui import QColor, QPainter
+from qtpy.QtWidgets import QWidget, QToolTip, QTableWidgetItem, QVBoxLayout
+
+from .tree import Node
+from .util import KeySplitter, human_size, redis_str
+from .qutil import ui_loadable
+
+
+#: raw value of a cell (used to sort)
+SortRole = Qt.UserRole
+NodeRole = Qt.UserRole + 1
+
+
+class UsageNode(Node):
+    """Key folder with the memory used by (and the number of) keys below it"""
+
+    __slots__ = ["nbytes", "count"]
+
+    def __init__(self, name, parent=None):
+        super().__init__(name, parent=parent, folder=True)
+        self.nbytes = 0
+        self.count = 0
+
+    def is_db(self):
+        return self.parent is not None and self.parent.parent is None
+
+
+class UsageModel(QAbstractItemModel):
+    """
+    Tree of the key folders (see :class:`~qredis.util.KeySplitter`) with
+    their memory usage. Also keeps the totals per type and the *top*
+    biggest keys.
+    """
+
+    HEADER = ("Name", "Keys", "Memory", "%")
+
+    #: max number of keys remembered to skip the ones SCAN returns again
+    #: (beyond, a key returned twice is counted twice)
+    SEEN_MAX = 1_000_000
+
+    def __init__(self, name="db", splitter=None, top=100, parent=None):
+        super().__init__(parent)
+        self.splitter = KeySplitter(":") if splitter is None else splitter
+        self.top = top
+        self.reset(name)
+
+    def reset(self, name=None):
+        self.beginResetModel()
+        if name is None:
+            name = self.db.name
+        self.root = UsageNode(None)
+        self.db = UsageNode(name, parent=self.root)
+        self.root.insert(name, self.db)
+        #: {type: [number of keys, bytes]}
+        self.types = {}
+        self._biggest = []
+        # SCAN may return a key more than once (ex: while rehashing)
+        self._seen = set()
+        self.endResetModel()
+
+    def forget_seen(self):
+        """Free the keys remembered (the scan is over)"""
+        self._seen = set()
+
+    def biggest(self):
+        """The biggest keys: list of (bytes, key, type, length)"""
+        return sorted(self._biggest, reverse=True)
+
+    def add(self, stats):
+        """
+        Add the (key, type, bytes, length) of analyzed keys. Returns the
+        number of keys not seen before.
+        """
+        split, biggest, top = self.splitter.split, self._biggest, self.top
+        seen, added = self._seen, 0
+        parents = set()
+        for key, dtype, nbytes, length in stats:
+            if key in seen:
+                continue
+            if len(seen) < self.SEEN_MAX:
+                seen.add(key)
+            added += 1
+            totals = self.types.setdefault(dtype, [0, 0])
+            totals[0] += 1
+            totals[1] += nbytes
+            if len(biggest) < top:
+                heapq.heappush(biggest, (nbytes, key, dtype, length))
+            elif nbytes > biggest[0][0]:
+                heapq.heapreplace(biggest, (nbytes, key, dtype, length))
+            node = self.db
+            node.nbytes += nbytes
+            node.count += 1
+            for name in split(key)[:-1]:
+                row = node.find(name)
+                if row < 0:
+                    child = UsageNode(name, parent=node)
+                    row = bisect.bisect(node.names, name)
+                    self.beginInsertRows(self._node_index(node), row, row)
+                    node.insert(name, child)
+                    self.endInsertRows()
+                else:
+                    child = node.items[row]
+                parents.add(node)
+                node = child
+                node.nbytes += nbytes
+                node.count += 1
+        # numbers changed
+        last = len(self.HEADER) - 1
+        self.dataChanged.emit(self.index(0, 0), self.index(0, last))
+        for node in parents:
+            items = node.items
+            first = self.createIndex(0, 0, items[0])
+            last_index = self.createIndex(len(items) - 1, last, items[-1])
+            self.dataChanged.emit(first, last_index)
+        return added
+
+    def _node_index(self, node):
+        return self.createIndex(node.row(), 0, node)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADER)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        node = parent.internalPointer() if parent.isValid() else self.root
+        return len(node.items)
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        node = parent.internalPointer() if parent.isValid() else self.root
+        return self.createIndex(row, column, node.items[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is self.root:
+            return QModelIndex()
+        return self.createIndex(parent.row(), 0, parent)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADER[section]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node, column = index.internalPointer(), index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return node.name
+            elif column == 1:
+                return str(node.count)
+            elif column == 2:
+                return human_size(node.nbytes)
+            total = self.db.nbytes
+            return f"{100 * node.nbytes / total:.1f}" if total else ""
+        elif role == SortRole:
+            if column == 0:
+                return node.name
+            return node.count if column == 1 else node.nbytes
+        elif role == Qt.ToolTipRole:
+            name = node.name if node.is_db() else node.full_name
+            return f"{name}\n{node.count} keys\n{node.nbytes} bytes"
+        elif role == Qt.TextAlignmentRole and column:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        elif role == NodeRole:
+            return node
+
+
+class MemoryAnalyzer(QObject):
+    """
+    Walks the keyspace (keys matching *pattern*) of a redis and feeds the
+    memory usage of the keys to a :class:`UsageModel`. The steps are bulk
+    executor tasks: they follow the rate limit of the connection (see
+    :class:`~qredis.throttle.Throttle`) to spare the server.
+
+    The analysis can be paused and resumed where it stopped (a SCAN step
+    interrupted is done again).
+    """
+
+    progress = Signal(int)
+    finished = Signal()
+    error = Signal(object)
+
+    #: SCAN COUNT hint
+    SCAN_COUNT = 500
+
+    def __init__(self, qredis, model, pattern="*", samples=5, parent=None):
+        super().__init__(parent)
+        self.qredis = qredis
+        self.model = model
+        self.pattern = pattern
+        self.samples = samples
+        self.cursor = 0
+        self.nb_keys = 0
+        self.done = False
+        self._running = False
+        self._group = ("memory", id(self))
+
+    def is_running(self):
+        return self._running
+
+    def start(self):
+        """Start or resume the analysis"""
+        if self._running or self.done:
+            return
+        self._running = True
+        self._step()
+
+    def pause(self):
+        self._running = False
+        self.qredis.executor.cancel(self._group)
+
+    def reset(self):
+        """Stop and forget the analysis done so far"""
+        self.pause()
+        self.cursor = 0
+        self.nb_keys = 0
+        self.done = False
+        self.model.reset()
+
+    def _step(self):
+        self.qredis.executor.submit(
+            self._analyze,
+            self.cursor,
+            callback=self._on_analyzed,
+            errback=self._on_error,
+            group=self._group,
+            bulk=True,
+        )
+
+    def _analyze(self, cursor):
+        # runs in the executor thread
+        cursor, keys = self.qredis.scan_keys(cursor, self.pattern, self.SCAN_COUNT)
+        stats = self.qredis.memory_stats(keys, self.samples) if keys else []
+        return cursor, stats
+
+    def _on_analyzed(self, result):
+        cursor, stats = result
+        self.cursor = cursor
+        self.nb_keys += self.model.add(stats)
+        self.progress.emit(self.nb_keys)
+        if cursor == 0:
+            self.done = True
+            self._running = False
+            self.model.forget_seen()
+            self.finished.emit()
+        elif self._running:
+            self._step()
+
+    def _on_error(self, error):
+        logging.error("error analyzing memory usage: %r", error)
+        self._running = False
+        self.error.emit(error)
+
+
+def _worst(row, side):
+    """Worst aspect ratio of a row of areas laid along *side*"""
+    total, side2 = sum(row), side * side
+    ratios = (side2 * area / total**2 for area in row)
+    return max(max(ratio, 1 / ratio) for ratio in ratios)
+
+
+def squarify(sizes, x, y, width, height):
+    """
+    Squarified treemap layout (Bruls, Huizing, van Wijk) of the given
+    *sizes* (positive, sorted in decreasing order) in a rectangle.
+    Returns a (x, y, width, height) rectangle per size.
+    """
+    total = sum(sizes)
+    if total <= 0 or width <= 0 or height <= 0:
+        return [(x, y, 0, 0) for _ in sizes]
+    scale = width * height / total
+    areas = [size * scale for size in sizes]
+    rects, i = [], 0
+    while i < len(areas):
+        side = min(width, height)
+        row = [areas[i]]
+        i += 1
+        # grow the row while it makes its rectangles more square
+        while i < len(areas) and _worst(row + [areas[i]], side) <= _worst(row, side):
+            row.append(areas[i])
+            i += 1
+        thickness = sum(row) / side
+        offset = 0
+        for area in row:
+            length = area / thickness
+            if width >= height:
+                rects.append((x, y + offset, thickness, length))
+            else:
+                rects.append((x + offset, y, length, thickness))
+            offset += length
+        if width >= height:
+            x, width = x + thickness, width - thickness
+        else:
+            y, height = y + thickness, height - thickness
+    return rects
+
+
+class Treemap(QWidget):
+    """
+    Treemap of the memory used by the sub-folders of a :class:`UsageNode`.
+    The keys directly in the folder (and the smallest sub-folders when
+    there are too many) are shown as a single "(other)" block.
+    """
+
+    folderClicked = Signal(object)
+
+    #: maximum number of folders shown
+    MAX_ITEMS = 200
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.node = None
+        self._blocks = []
+        self.setMinimumSize(100, 100)
+
+    def set_node(self, node):
+        self.node = node
+        self._layout()
+        self.update()
+
+    def _layout(self):
+        self._blocks = []
+        node = self.node
+        if node is None or not node.nbytes:
+            return
+        items = sorted(node.items, key=lambda child: child.nbytes, reverse=True)
+        items = [item for item in items[: self.MAX_ITEMS] if item.nbytes > 0]
+        sizes = [item.nbytes for item in items]
+        other = node.nbytes - sum(sizes)
+        if other > 0:
+            items.append(None)
+            sizes.append(other)
+            order = sorted(range(len(sizes)), key=sizes.__getitem__, reverse=True)
+            items = [items[i] for i in order]
+            sizes = [sizes[i] for i in order]
+        rects = squarify(sizes, 0, 0, self.width(), self.height())
+        self._blocks = [
+            (QRectF(*rect), item, size) for rect, item, size in zip(rects, items, sizes)
+        ]
+
+    def _block_at(self, pos):
+        for block in self._blocks:
+            if block[0].contains(pos):
+                return block
+
+    def resizeEvent(self, event):
+        self._layout()
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        for rect, item, size in self._blocks:
+            if item is None:
+                name, color = "(other)", QColor(200, 200, 200)
+            else:
+                name = item.name
+                color = QColor.fromHsv(sum(map(ord, name)) * 37 % 360, 80, 235)
+            painter.fillRect(rect, color)
+            painter.setPen(QColor(80, 80, 80))
+            painter.drawRect(rect)
+            if rect.width() > 40 and rect.height() > 16:
+                painter.setPen(Qt.black)
+                text = f"{name}\n{human_size(size)}"
+                painter.drawText(rect.adjusted(3, 2, -3, -2), Qt.TextWordWrap, text)
+
+    def mousePressEvent(self, event):
+        block = self._block_at(event.pos())
+        if block is not None and block[1] is not None:
+            self.folderClicked.emit(block[1])
+
+    def event(self, event):
+        if event.type() == QEvent.ToolTip:
+            block = self._block_at(event.pos())
+            if block is None:
+                QToolTip.hideText()
+            else:
+                rect, item, size = block
+                name = "(other)" if item is None else item.full_name
+                QToolTip.showText(event.globalPos(), f"{name}\n{human_size(size)}")
+            return True
+        return super().event(event)
+
+
+class SizeItem(QTableWidgetItem):
+    """Table item sorted by its raw size (SortRole) instead of its text"""
+
+    def __lt__(self, other):
+        return self.data(SortRole) < other.data(SortRole)
+
+
+@ui_loadable
+class MemoryPanel(QWidget):
+    """Memory usage analyzer of a redis: folder tree, treemap and top keys"""
+
+    #: number of biggest keys listed
+    TOP = 100
+
+    def __init__(self, parent=None):
+        super(MemoryPanel, self).__init__(parent)
+        self.load_ui()
+        ui = self.ui
+        self.redis = None
+        self.analyzer = None
+        self.model = UsageModel(top=self.TOP, parent=self)
+        self.sort_model = QSortFilterProxyModel(self)
+        self.sort_model.setSortRole(SortRole)
+        self.sort_model.setSourceModel(self.model)
+        ui.folder_tree.setModel(self.sort_model)
+        ui.folder_tree.sortByColumn(2, Qt.DescendingOrder)
+        ui.folder_tree.selectionModel().currentChanged.connect(self._on_folder_changed)
+        self.treemap = Treemap()
+        self.treemap.folderClicked.connect(self._select_folder)
+        layout = QVBoxLayout(ui.treemap_tab)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.treemap)
+        ui.top_table.setColumnCount(4)
+        ui.top_table.setHorizontalHeaderLabels(("Key", "Type", "Memory", "Length"))
+        ui.start_button.clicked.connect(self._on_start)
+        ui.reset_button.clicked.connect(self._on_reset)
+        # views are refreshed at most twice a second while analyzing
+        self._update_timer = QTimer(self)
+        self._update_timer.setSingleShot(True)
+        self._update_timer.setInterval(500)
+        self._update_timer.timeout.connect(self._update_views)
+
+    def set_redis(self, redis, splitter=None):
+        """Analyze the given redis (the analysis done so far is kept if same)"""
+        if redis is self.redis:
+            return
+        if self.analyzer is not None:
+            self.analyzer.pause()
+        self.redis = redis
+        if splitter is not None:
+            self.model.splitter = splitter
+        self.model.reset(redis_str(redis)[0])
+        self.analyzer = MemoryAnalyzer(redis, self.model, parent=self)
+        self.analyzer.progress.connect(self._on_progress)
+        self.analyzer.finished.connect(self._on_finished)
+        self.analyzer.error.connect(self._on_error)
+        self._update_buttons()
+        self._update_views()
+
+    def _on_start(self):
+        analyzer = self.analyzer
+        if analyzer.is_running():
+            analyzer.pause()
+        else:
+            if analyzer.done:
+                analyzer.reset()
+            analyzer.pattern = self.ui.pattern.text() or "*"
+            analyzer.start()
+        self._update_buttons()
+
+    def _on_reset(self):
+        self.analyzer.reset()
+        self._update_buttons()
+        self._update_views()
+
+    def _update_buttons(self):
+        ui, analyzer = self.ui, self.analyzer
+        running = analyzer.is_running()
+        if running:
+            text = "Pause"
+        elif analyzer.nb_keys and not analyzer.done:
+            text = "Resume"
+        else:
+            text = "Start"
+        ui.start_button.setText(text)
+        # the pattern applies to the whole analysis
+        ui.pattern.setEnabled(not running and (not analyzer.nb_keys or analyzer.done))
+        self._update_status()
+
+    def _update_status(self):
+        analyzer = self.analyzer
+        text = f"{analyzer.nb_keys} keys, {human_size(self.model.db.nbytes)}"
+        if analyzer.is_running():
+            text += " (analyzing...)"
+        elif analyzer.nb_keys and not analyzer.done:
+            text += " (paused)"
+        self.ui.status.setText(text)
+
+    def _on_progress(self, nb_keys):
+        self._update_status()
+        if not self._update_timer.isActive():
+            self._update_timer.start()
+
+    def _on_finished(self):
+        self._update_buttons()
+        self._update_views()
+
+    def _on_error(self, error):
+        self._update_buttons()
+        self.ui.status.setText(f"Error: {error}")
+
+    def _current_folder(self):
+        node = self.ui.folder_tree.currentIndex().data(NodeRole)
+        return self.model.db if node is None else node
+
+    def _on_folder_changed(self, current, previous):
+        self.treemap.set_node(self._current_folder())
+
+    def _select_folder(self, node):
+        index = self.model.createIndex(node.row(), 0, node)
+        self.ui.folder_tree.setCurrentIndex(self.sort_model.mapFromSource(index))
+
+    def _update_views(self):
+        self.treemap.set_node(self._current_folder())
+        table = self.ui.top_table
+        biggest = self.model.biggest()
+        table.setSortingEnabled(False)
+        table.setRowCount(len(biggest))
+        for row, (nbytes, key, dtype, length) in enumerate(biggest):
+            memory = SizeItem(human_size(nbytes))
+            memory.setData(SortRole, nbytes)
+            memory.setTextAlignment(int(Qt.AlignRight | Qt.AlignVCenter))
+            size = QTableWidgetItem()
+            size.setData(Qt.DisplayRole, length)
+            items = QTableWidgetItem(key), QTableWidgetItem(dtype), memory, size
+            for column, item in enumerate(items):
+                item.setFlags(item.flags() & ~Qt.ItemIsEditable)
+                table.setItem(row, column, item)
+        table.setSortingEnabled(True)
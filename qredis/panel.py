@@ -3,30 +3,42 @@ from qtpy.QtWidgets import QSplitter
 
 from .tree import RedisTree
 from .editor import RedisEditor
+from .pubsub import PubSubPanel
 
 
 class RedisPanel(QSplitter):
-    def __init__(self, redis, parent=None):
+    def __init__(self, redis, opts=None, parent=None):
         super(RedisPanel, self).__init__(parent)
         self.redis = redis
-        self.tree = RedisTree(redis, parent=self)
+        self.tree = RedisTree(redis, opts, parent=self)
         self.editor = RedisEditor(self)
         self.tree.setWindowFlags(Qt.Widget)
+        # next to the editor, shown on demand
+        self.pubsub = PubSubPanel(self)
+        self.pubsub.set_redis(redis)
+        self.pubsub.setVisible(False)
         self.addWidget(self.tree)
         self.addWidget(self.editor)
+        self.addWidget(self.pubsub)
         self.setStretchFactor(0, 1)
         self.setStretchFactor(1, 1)
+        self.setStretchFactor(2, 1)
         self.tree.currentChanged.connect(self.__on_selection_changed)
         self.tree.addKey.connect(self.editor.set_item)
+        self.tree.ui.pubsub_action.toggled.connect(self.pubsub.setVisible)
 
     def __on_add_key(self, item):
         self.editor.set_item(item)
 
     def __on_selection_changed(self, node):
+        # discard a pending fetch of the previously selected key
+        self.redis.executor.cancel(self.editor.item.load_group)
         if node is None:
             self.editor.set_empty()
         elif node.is_key():
-            item = self.redis.get(node.key)
-            self.editor.set_item(item)
+            # known type allows fetching the key in a single round trip
+            meta = self.tree.source_model.meta_cache.get(node.key)
+            dtype = None if meta is None else meta.type
+            self.editor.load_item(self.redis, node.key, dtype)
         elif node.is_db():
-            self.editor.set_db(self.redis)
+            self.editor.set_db(self.redis, self.tree.source_model.splitter)
@@ -0,0 +1,379 @@
+"""
+Pub/Sub monitor.
+
+Subscribes to channels and patterns on a dedicated connection and
+thread. Messages are kept raw in a bounded ring buffer and only decoded
+(with the value codecs, see :func:`~qredis.codec.decode`) when shown, so
+that tens of thousands of messages per second never freeze the GUI.
+"""
+
+import time
+import logging
+import threading
+import collections
+
+from qtpy.QtCore import (
+    Qt,
+    QObject,
+    QTimer,
+    Signal,
+    QModelIndex,
+    QAbstractTableModel,
+)
+from qtpy.QtWidgets import QWidget, QHeaderView, QTableWidgetItem
+
+from .codec import decode
+from .qutil import ui_loadable
+
+
+#: characters which make a subscription a pattern (PSUBSCRIBE)
+GLOB_CHARS = set("*?[")
+
+#: throughput of a :class:`PubSubMonitor` (see *statsChanged*): messages
+#: *received* in total, *rate* in messages per second, messages *dropped*
+#: (received but never delivered) and {channel: (messages, rate)}
+PubSubStats = collections.namedtuple("PubSubStats", "received rate dropped channels")
+
+
+def is_pattern(name):
+    return not GLOB_CHARS.isdisjoint(name)
+
+
+class PubSubMonitor(QObject):
+    """
+    Listens to the channels and patterns subscribed with :meth:`subscribe`
+    on a dedicated connection and thread.
+
+    Messages, as (time, channel, raw data), are buffered and delivered in
+    the GUI thread through *messagesReceived* at a fixed frame rate
+    (*fps*). The buffer keeps at most *cap* messages: when the GUI can't
+    keep up, or while paused, the oldest are dropped. Statistics, per
+    channel included, are published every second through *statsChanged*.
+    """
+
+    messagesReceived = Signal(object)
+    statsChanged = Signal(object)
+    error = Signal(object)
+
+    #: max seconds between two checks for (un)subscriptions
+    POLL = 0.1
+
+    def __init__(self, qredis, cap=100_000, fps=10):
+        super().__init__(qredis)
+        self.qredis = qredis
+        self.received = 0
+        self.dropped = 0
+        self.rate = 0.0
+        self.paused = False
+        #: subscribed channels and patterns
+        self.subscriptions = set()
+        self._lock = threading.Lock()
+        self._pending = collections.deque(maxlen=cap)
+        self._commands = []
+        self._counts = collections.Counter()
+        self._rates = {}
+        self._last_counts = {}
+        self._thread = None
+        self._stop = None
+        self._rate_time = time.monotonic()
+        self._rate_received = 0
+        self._timer = QTimer(self)
+        self._timer.setInterval(1000 // fps)
+        self._timer.timeout.connect(self._flush)
+        self.error.connect(self.stop)
+
+    def is_running(self):
+        return self._thread is not None
+
+    def subscribe(self, *names):
+        """Subscribe to channels or patterns (names with *, ? or [)"""
+        names = set(names) - self.subscriptions
+        if not names:
+            return
+        self.subscriptions |= names
+        with self._lock:
+            self._commands.append(("subscribe", names))
+        self.start()
+
+    def unsubscribe(self, *names):
+        """Unsubscribe from the given channels and patterns (default: all)"""
+        names = set(names or self.subscriptions) & self.subscriptions
+        self.subscriptions -= names
+        if not self.subscriptions:
+            self.stop()
+        elif names:
+            with self._lock:
+                self._commands.append(("unsubscribe", names))
+
+    def pause(self, paused=True):
+        """Hold the delivery of messages (they keep being received)"""
+        self.paused = paused
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        channels = {
+            channel: (count, self._rates.get(channel, 0.0))
+            for channel, count in counts.items()
+        }
+        return PubSubStats(self.received, self.rate, self.dropped, channels)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(self._stop,), name="redis-pubsub", daemon=True
+        )
+        self._thread.start()
+        self._timer.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread = None
+        self._timer.stop()
+        self.subscriptions = set()
+        with self._lock:
+            self._pending.clear()
+            self._commands = []
+
+    def _update_subscriptions(self, pubsub):
+        with self._lock:
+            commands, self._commands = self._commands, []
+        for command, names in commands:
+            patterns = [name for name in names if is_pattern(name)]
+            channels = [name for name in names if not is_pattern(name)]
+            if patterns:
+                getattr(pubsub, "p" + command)(*patterns)
+            if channels:
+                getattr(pubsub, command)(*channels)
+
+    def _run(self, stop):
+        pubsub = None
+        try:
+            pubsub = self.qredis.redis.pubsub(ignore_subscribe_messages=True)
+            while not stop.is_set():
+                self._update_subscriptions(pubsub)
+                if not pubsub.subscribed:
+                    stop.wait(self.POLL)
+                    continue
+                # block for the first message, then drain what has arrived
+                messages = []
+                message = pubsub.get_message(timeout=self.POLL)
+                while message is not None:
+                    channel = message["channel"].decode(errors="replace")
+                    messages.append((time.time(), channel, message["data"]))
+                    message = pubsub.get_message(timeout=0)
+                if messages and not stop.is_set():
+                    self._push(messages)
+        except Exception as error:
+            if not stop.is_set():
+                logging.error("pub/sub monitor stopped: %r", error)
+                self.error.emit(error)
+        finally:
+            if pubsub is not None:
+                pubsub.close()
+
+    def _push(self, messages):
+        counts = collections.Counter(channel for _, channel, _ in messages)
+        with self._lock:
+            pending = self._pending
+            self.received += len(messages)
+            self.dropped += max(0, len(pending) + len(messages) - pending.maxlen)
+            pending.extend(messages)
+            self._counts.update(counts)
+
+    def _flush(self):
+        now = time.monotonic()
+        with self._lock:
+            received = self.received
+            if self.paused:
+                messages = []
+            else:
+                messages = list(self._pending)
+                self._pending.clear()
+        elapsed = now - self._rate_time
+        if elapsed >= 1.0:
+            self.rate = (received - self._rate_received) / elapsed
+            with self._lock:
+                counts = dict(self._counts)
+            last = self._last_counts
+            self._rates = {
+                channel: (count - last.get(channel, 0)) / elapsed
+                for channel, count in counts.items()
+            }
+            self._last_counts = counts
+            self._rate_time, self._rate_received = now, received
+            self.statsChanged.emit(self.stats())
+        if messages:
+            self.messagesReceived.emit(messages)
+
+
+class MessageModel(QAbstractTableModel):
+    """
+    Table model of pub/sub messages: a ring buffer of at most *cap* rows
+    (appending beyond the cap drops the oldest rows). Messages are kept
+    raw and decoded when the view asks for them (only visible rows are).
+    """
+
+    header = ("Time", "Channel", "Message")
+
+    def __init__(self, cap=100_000, parent=None):
+        super().__init__(parent)
+        self.messages = collections.deque(maxlen=cap)
+
+    def clear(self):
+        self.beginResetModel()
+        self.messages.clear()
+        self.endResetModel()
+
+    def append(self, messages):
+        cap = self.messages.maxlen
+        messages = messages[-cap:]
+        drop = len(self.messages) + len(messages) - cap
+        if drop > 0:
+            self.beginRemoveRows(QModelIndex(), 0, drop - 1)
+            for _ in range(drop):
+                self.messages.popleft()
+            self.endRemoveRows()
+        if messages:
+            start = len(self.messages)
+            self.beginInsertRows(QModelIndex(), start, start + len(messages) - 1)
+            self.messages.extend(messages)
+            self.endInsertRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.messages)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.header)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.header[section]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role not in {Qt.DisplayRole, Qt.ToolTipRole} or not index.isValid():
+            return None
+        stamp, channel, data = self.messages[index.row()]
+        column = index.column()
+        if column == 0:
+            ms = int(stamp * 1000) % 1000
+            return time.strftime("%H:%M:%S", time.localtime(stamp)) + f".{ms:03d}"
+        elif column == 1:
+            return channel
+        return decode(data, channel)
+
+
+@ui_loadable
+class PubSubPanel(QWidget):
+    """Subscribes to channels and patterns and shows the messages"""
+
+    #: max number of messages kept
+    CAP = 100_000
+    #: max number of channels listed (the busiest)
+    CHANNELS = 100
+
+    def __init__(self, parent=None):
+        super(PubSubPanel, self).__init__(parent)
+        self.load_ui()
+        ui = self.ui
+        self.redis = None
+        self.monitor = None
+        self.model = MessageModel(cap=self.CAP, parent=self)
+        ui.messages.setModel(self.model)
+        # fixed row heights: the view never measures the rows
+        header = ui.messages.verticalHeader()
+        header.setSectionResizeMode(QHeaderView.Fixed)
+        header.setDefaultSectionSize(ui.messages.fontMetrics().height() + 4)
+        ui.messages.horizontalHeader().setStretchLastSection(True)
+        ui.channels_table.setColumnCount(3)
+        ui.channels_table.setHorizontalHeaderLabels(("Channel", "Messages", "Rate"))
+        ui.subscribe_button.clicked.connect(self._on_subscribe)
+        ui.channels.returnPressed.connect(self._on_subscribe)
+        ui.unsubscribe_button.clicked.connect(self._on_unsubscribe)
+        ui.pause_button.toggled.connect(self._on_pause)
+        ui.clear_button.clicked.connect(self.model.clear)
+        self._update()
+
+    def set_redis(self, redis):
+        if redis is self.redis:
+            return
+        self.stop()
+        self.redis = redis
+        self.model.clear()
+
+    def stop(self):
+        """Unsubscribe from everything"""
+        if self.monitor is not None:
+            self.monitor.stop()
+            self.monitor.deleteLater()
+            self.monitor = None
+        self._update()
+
+    def _on_subscribe(self):
+        names = self.ui.channels.text().split()
+        if not names or self.redis is None:
+            return
+        if self.monitor is None:
+            self.monitor = PubSubMonitor(self.redis, cap=self.CAP)
+            self.monitor.messagesReceived.connect(self._on_messages)
+            self.monitor.statsChanged.connect(self._on_stats)
+            self.monitor.error.connect(self._on_error)
+            self.monitor.pause(self.ui.pause_button.isChecked())
+        self.monitor.subscribe(*names)
+        self.ui.channels.clear()
+        self._update()
+
+    def _on_unsubscribe(self):
+        self.stop()
+
+    def _on_pause(self, paused):
+        if self.monitor is not None:
+            self.monitor.pause(paused)
+
+    def _on_messages(self, messages):
+        view = self.ui.messages
+        bar = view.verticalScrollBar()
+        at_bottom = bar.value() == bar.maximum()
+        self.model.append(messages)
+        if at_bottom:
+            view.scrollToBottom()
+
+    def _on_stats(self, stats):
+        text = f"{stats.rate:.0f} msg/s, {stats.received} received"
+        if stats.dropped:
+            text += f", {stats.dropped} dropped"
+        self.ui.status.setText(text)
+        table = self.ui.channels_table
+        channels = sorted(stats.channels.items(), key=lambda i: i[1], reverse=True)
+        channels = channels[: self.CHANNELS]
+        table.setSortingEnabled(False)
+        table.setRowCount(len(channels))
+        for row, (channel, (count, rate)) in enumerate(channels):
+            table.setItem(row, 0, QTableWidgetItem(channel))
+            for column, value in ((1, count), (2, round(rate, 1))):
+                item = QTableWidgetItem()
+                item.setData(Qt.DisplayRole, value)
+                table.setItem(row, column, item)
+        table.setSortingEnabled(True)
+
+    def _on_error(self, error):
+        self.ui.status.setText(f"error: {error}")
+        self.monitor.deleteLater()
+        self.monitor = None
+        self._update()
+
+    def _update(self):
+        ui, monitor = self.ui, self.monitor
+        subscriptions = sorted(monitor.subscriptions) if monitor else []
+        ui.unsubscribe_button.setEnabled(bool(subscriptions))
+        ui.subscriptions.setText(" ".join(subscriptions) or "not subscribed")
+
+    def hideEvent(self, event):
+        # closed (not minimized): unsubscribe
+        if not event.spontaneous():
+            self.stop()
+        super(PubSubPanel, self).hideEvent(event)
@@ -1,76 +1,615 @@
-import pickle
+import time
+import uuid
 import collections
 
-import msgpack
-import msgpack_numpy
-from redis import Redis
+from redis import Redis, WatchError
 from qtpy.QtCore import QObject, Signal
 
-from .util import KeyItem
+from .util import KeyItem, KeyMeta
+from .worker import Executor
+from .throttle import Throttle
+from .codec import decode, load, msgpack_pack, msgpack_unpack  # noqa: F401
 
 
-def msgpack_pack(data):
-    return msgpack.packb(data, use_bin_type=True, default=msgpack_numpy.encode)
+def _decode_hash(value, key=None):
+    return {decode(k, key): decode(v, key) for k, v in value.items()}
 
 
-def msgpack_unpack(buff):
-    return msgpack.unpackb(buff, raw=False, object_hook=msgpack_numpy.decode)
+def _decode_list(value, key=None):
+    return [decode(i, key) for i in value]
 
 
-def decode_utf8(v):
-    return v.decode()
+def _decode_set(value, key=None):
+    return {decode(i, key) for i in value}
 
 
-def decode_pickle(v):
-    return str(pickle.loads(v))
+def _decode_zset(value, key=None):
+    # scores stay floats (redis-py casts them)
+    return {decode(member, key): score for member, score in value}
 
 
-def decode_msgpack(v):
-    return str(msgpack_unpack(v))
+def _decode_stream(value, key=None):
+    data = []
+    for event_time, event_data_raw in value:
+        event_time = decode(event_time)
+        event_data = {
+            decode(member): decode(score, key)
+            for member, score in event_data_raw.items()
+        }
+        data.append((event_time, event_data))
+    return data
 
 
-DECODES = [
-    (decode_utf8, "utf-8"),
-    (decode_pickle, "pickle"),
-    (decode_msgpack, "msgpack"),
-    (str, "raw"),
-]
+class zset(list):
+    pass
 
 
-def decode(value):
-    for decoder, dtype in DECODES:
-        try:
-            return decoder(value)
-        except Exception:
+class stream(tuple):
+    pass
+
+
+def _queue_ttl(pipe, key, ttl):
+    # ttl in ms as given by PTTL (< 0: persistent or no key)
+    if ttl > 0:
+        pipe.pexpire(key, ttl)
+    else:
+        pipe.persist(key)
+
+
+#: max number of elements written by a single command (see QRedis.write_value)
+WRITE_CHUNK = 1000
+
+#: max number of bytes of a string written by a single command
+WRITE_CHUNK_BYTES = 1 << 20
+
+#: number of write commands sent per round trip
+WRITE_PIPELINE = 10
+
+#: TTL (s) of the temporary key where a big value is built, so that an
+#: interrupted write leaves nothing behind
+TMP_TTL = 3600
+
+
+def _chunks(items, size):
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def _split_string(value, chunk):
+    data = value if isinstance(value, bytes) else str(value).encode()
+    # memoryview: chunks are not copies
+    return _chunks(memoryview(data), WRITE_CHUNK_BYTES) or [b""]
+
+
+def _split_items(value, chunk):
+    return _chunks(list(value), chunk)
+
+
+def _split_hash(value, chunk):
+    return _chunks(list(value.items()), chunk)
+
+
+#: value type: (split value in chunks, queue the command writing a chunk)
+VALUE_WRITERS = {
+    str: (_split_string, lambda p, k, part: p.append(k, part)),
+    bytes: (_split_string, lambda p, k, part: p.append(k, part)),
+    list: (_split_items, lambda p, k, part: p.rpush(k, *part)),
+    set: (_split_items, lambda p, k, part: p.sadd(k, *part)),
+    dict: (_split_hash, lambda p, k, part: p.hset(k, mapping=dict(part))),
+    zset: (
+        _split_items,
+        lambda p, k, part: p.zadd(k, {m: float(s) for m, s in part}),
+    ),
+}
+
+
+class _Commands:
+    """
+    Records the commands called on it (ex: ``commands.hset(key, ...)``)
+    as (name, args, kwargs) in *queued*, to be sent later on a pipeline
+    (see QRedis._write_tmp: all on the same key, their first argument)
+    """
+
+    def __init__(self):
+        self.queued = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.queued.append((name, args, kwargs))
+
+
+#: Changes made to the loaded part of a collection value (see
+#: QRedis.apply_edit): the *original* rows as loaded, the current *rows*
+#: as (index of the original row or None for a new row, row), the
+#: *length* of the value when loaded, if it was *complete*ly loaded and
+#: the *raw* redis element (bytes) of each original row (None: unknown)
+CollectionEdit = collections.namedtuple(
+    "CollectionEdit", "type original rows length complete raw"
+)
+
+
+def _raw(edit, index):
+    """The redis element the original row *index* was decoded from"""
+    raw = edit.raw[index]
+    return edit.original[index][0] if raw is None else raw
+
+
+def _edit_size(edit):
+    """Number of elements added, changed or removed by an edit"""
+    size = kept = 0
+    for origin, row in edit.rows:
+        if origin is None:
+            size += 1
+        else:
+            kept += 1
+            size += row != edit.original[origin]
+    return size + len(edit.original) - kept
+
+
+def _keyed_diff(edit):
+    """
+    Diff of a hash, set or zset edit (rows keyed by their 1st cell, as
+    displayed): original {field: value}, {field: raw field}, removed
+    fields and {field: value} of the new or changed fields
+    """
+    original = dict(edit.original)
+    fields = {row[0]: _raw(edit, i) for i, row in enumerate(edit.original)}
+    current = dict(row for _, row in edit.rows)
+    removed = [field for field in original if field not in current]
+    changed = {
+        field: value
+        for field, value in current.items()
+        if field not in original or original[field] != value
+    }
+    return original, fields, removed, changed
+
+
+def _write_hash(pipe, key, edit, raw):
+    # elements loaded are addressed by their raw field: never as displayed
+    _, fields, removed, changed = _keyed_diff(edit)
+    changed = [(fields.get(field, field), value) for field, value in changed.items()]
+    for part in _chunks([fields[field] for field in removed], WRITE_CHUNK):
+        pipe.hdel(key, *part)
+    for part in _chunks(changed, WRITE_CHUNK):
+        pipe.hset(key, mapping=dict(part))
+
+
+def _check_hash(pipe, key, edit):
+    original, fields, removed, changed = _keyed_diff(edit)
+    names = removed + [field for field in changed if field in original]
+    for field in names:
+        pipe.hget(key, fields[field])
+    expected = [original[field] for field in names]
+    return expected, lambda replies: [decode(reply, key) for reply in replies]
+
+
+def _write_zset(pipe, key, edit, raw):
+    _, members, removed, changed = _keyed_diff(edit)
+    changed = [(members.get(m, m), float(score)) for m, score in changed.items()]
+    for part in _chunks([members[member] for member in removed], WRITE_CHUNK):
+        pipe.zrem(key, *part)
+    for part in _chunks(changed, WRITE_CHUNK):
+        pipe.zadd(key, dict(part))
+
+
+def _check_zset(pipe, key, edit):
+    original, members, removed, changed = _keyed_diff(edit)
+    names = removed + [member for member in changed if member in original]
+    for member in names:
+        pipe.zscore(key, members[member])
+    return [float(original[member]) for member in names], list
+
+
+def _write_set(pipe, key, edit, raw):
+    members = {row[0]: _raw(edit, i) for i, row in enumerate(edit.original)}
+    current = {row[0] for _, row in edit.rows}
+    removed = [members[member] for member in members if member not in current]
+    for part in _chunks(removed, WRITE_CHUNK):
+        pipe.srem(key, *part)
+    for part in _chunks([m for m in current if m not in members], WRITE_CHUNK):
+        pipe.sadd(key, *part)
+
+
+def _check_set(pipe, key, edit):
+    # adding or removing members is idempotent: WATCH is enough
+    return [], None
+
+
+def _list_changes(edit):
+    """
+    Diff of a list edit: original indexes removed, {original index: new
+    value} of the changed elements and the new elements as
+    [(index of the original element they precede or None, values)]
+    """
+    original = edit.original
+    kept = {origin for origin, _ in edit.rows if origin is not None}
+    removed = [i for i in range(len(original)) if i not in kept]
+    changed, runs, values = {}, [], []
+    for origin, row in edit.rows:
+        if origin is None:
+            values.append(row[0])
             continue
+        if values:
+            runs.append((origin, values))
+            values = []
+        if row != original[origin]:
+            changed[origin] = row[0]
+    if values:
+        runs.append((None, values))
+    return removed, changed, runs
 
 
-def _set(redis, key, value):
-    redis.set(key, value)
+def _list_anchors(edit, runs):
+    """Original indexes of the elements new ones are inserted next to"""
+    anchors = {anchor for anchor, _ in runs if anchor is not None}
+    if runs and runs[-1][0] is None and edit.original and not edit.complete:
+        anchors.add(len(edit.original) - 1)
+    return anchors
 
 
-def _set_list(redis, key, lst):
-    redis.delete(key)
-    redis.rpush(key, *lst)
+def _read_list(pipe, key, edit):
+    # the anchors kept as they are must be restored with their raw value
+    removed, changed, runs = _list_changes(edit)
+    indexes = sorted(_list_anchors(edit, runs) - set(removed) - set(changed))
+    for index in indexes:
+        pipe.lindex(key, index)
+    return lambda replies: dict(zip(indexes, replies))
 
 
-def _set_set(redis, key, st):
-    redis.delete(key)
-    redis.sadd(key, *tuple(st))
+def _write_list(pipe, key, edit, raw):
+    """
+    LSET the changed elements, LINSERT the new ones next to a unique
+    marker value (set on the element they precede, then restored to its
+    *raw* value) and finally LREM the removed ones (replaced by a unique
+    tombstone first)
+    """
+    removed, changed, runs = _list_changes(edit)
+    size = len(edit.original)
+    tombstone = f"qredis:tombstone:{uuid.uuid4()}"
+    marker = f"qredis:marker:{uuid.uuid4()}"
+    for index in removed:
+        pipe.lset(key, index, tombstone)
+    for index, value in changed.items():
+        pipe.lset(key, index, value)
 
+    def final(index):
+        if index in changed:
+            return changed[index]
+        return tombstone if index in removed else raw[index]
 
-class zset(list):
-    pass
+    shift = 0  # number of elements inserted so far
+    for anchor, values in runs:
+        if anchor is not None:
+            pipe.lset(key, anchor + shift, marker)
+            for value in values:
+                pipe.linsert(key, "BEFORE", marker, value)
+            shift += len(values)
+            pipe.lset(key, anchor + shift, final(anchor))
+        elif size == 0:
+            for part in reversed(_chunks(values, WRITE_CHUNK)):
+                pipe.lpush(key, *reversed(part))
+        elif edit.complete:
+            for part in _chunks(values, WRITE_CHUNK):
+                pipe.rpush(key, *part)
+        else:
+            # after the last element loaded
+            anchor = size - 1
+            pipe.lset(key, anchor + shift, marker)
+            for value in reversed(values):
+                pipe.linsert(key, "AFTER", marker, value)
+            pipe.lset(key, anchor + shift, final(anchor))
+    if removed:
+        pipe.lrem(key, 0, tombstone)
 
 
-class stream(tuple):
-    pass
+def _check_list(pipe, key, edit):
+    removed, changed, runs = _list_changes(edit)
+    indexes = set(removed) | set(changed) | _list_anchors(edit, runs)
+    pipe.llen(key)
+    expected = [edit.length]
+    for index in sorted(indexes):
+        pipe.lindex(key, index)
+        expected.append(edit.original[index][0])
+    return expected, lambda replies: replies[:1] + [decode(r, key) for r in replies[1:]]
+
+
+#: type: (queue the commands writing an edit, queue the commands reading
+#: the elements changed: returns their original value and how to decode
+#: the replies, None or queue the commands reading the raw values the
+#: writes need: returns how to turn the replies into the *raw* argument)
+EDIT_COMMANDS = {
+    "hash": (_write_hash, _check_hash, None),
+    "zset": (_write_zset, _check_zset, None),
+    "set": (_write_set, _check_set, None),
+    "list": (_write_list, _check_list, _read_list),
+}
+
+
+#: consumer group of a stream (see QRedis.stream_groups): *pending* is
+#: the number of entries delivered but not acknowledged, *first_pending*
+#: and *last_pending* their lowest and highest IDs
+StreamGroup = collections.namedtuple(
+    "StreamGroup", "name consumers pending last_id first_pending last_pending"
+)
+
+#: consumer of a stream group: *idle* is in ms
+StreamConsumer = collections.namedtuple("StreamConsumer", "name pending idle")
+
+
+#: default number of collection elements fetched per page
+PAGE_SIZE = 500
+
+#: default size of a value preview (see QRedis.meta): elements of a
+#: collection
+PREVIEW_SIZE = 10
+
+#: default size of a string preview (see QRedis.meta): bytes (a tooltip
+#: shows 80 characters)
+PREVIEW_BYTES = 80
+
+#: dtype: (queue size command, queue preview command, decode preview)
+META_COMMANDS = {
+    "string": (
+        lambda p, k: p.strlen(k),
+        lambda p, k, n: p.getrange(k, 0, n - 1),
+        decode,
+    ),
+    "list": (
+        lambda p, k: p.llen(k),
+        lambda p, k, n: p.lrange(k, 0, n - 1),
+        _decode_list,
+    ),
+    "hash": (
+        lambda p, k: p.hlen(k),
+        lambda p, k, n: p.hscan(k, 0, count=n),
+        lambda reply: _decode_hash(reply[1]),
+    ),
+    "set": (
+        lambda p, k: p.scard(k),
+        lambda p, k, n: p.sscan(k, 0, count=n),
+        lambda reply: _decode_set(reply[1]),
+    ),
+    "zset": (
+        lambda p, k: p.zcard(k),
+        lambda p, k, n: p.zrange(k, 0, n - 1, withscores=True),
+        _decode_zset,
+    ),
+    "stream": (
+        lambda p, k: p.xlen(k),
+        lambda p, k, n: p.xrange(k, count=n),
+        _decode_stream,
+    ),
+}
+
+
+class Pager:
+    """
+    Fetches the elements of a collection key in pages of *size* elements
+    so that huge values are never materialized at once. Each page is a
+    list of rows (tuples, one item per table column) and *raw* holds the
+    redis element (bytes) each row of the page was decoded from (the list
+    element, hash field or set/zset member). *length* is the size of the
+    collection as of the last fetched page.
+    """
+
+    length_command = None
+
+    def __init__(self, redis, key, size=PAGE_SIZE):
+        self.redis = redis
+        self.key = key
+        self.size = size
+        self.length = None
+        self.page = []
+        self.raw = []
+        self.pages = 0
+        self.done = False
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.key!r}, length={self.length})"
+
+    def __str__(self):
+        return str(self.page)
+
+    def queue(self, pipe):
+        """Queue the commands to fetch the next page in the pipeline"""
+        getattr(pipe, self.length_command)(self.key)
+        self._queue_page(pipe)
+
+    def feed(self, length, reply):
+        """Consume the replies to the commands queued by :meth:`queue`"""
+        self.length = length
+        self.page = self._feed_page(reply)
+        self.pages += 1
+        return self.page
+
+    def next_page(self):
+        pipe = self.redis.pipeline(transaction=False)
+        self.queue(pipe)
+        reply = pipe.execute()
+        self.redis.throttle.spend(len(reply))
+        return self.feed(*reply)
+
+    def restart(self):
+        """A new pager of the same key, positioned at the first page"""
+        return type(self)(self.redis, self.key, self.size)
+
+    def first_page(self):
+        """
+        Returns a pager positioned after its first page and the rows of
+        that page. A pager which already went further is restarted (and
+        its first page is left to be fetched).
+        """
+        if self.pages == 1:
+            return self, self.page
+        return self.restart(), []
+
+    def remaining(self):
+        """Fetch all pages still to be fetched"""
+        rows = []
+        while not self.done:
+            rows.extend(self.next_page())
+        return rows
+
+    def _queue_page(self, pipe):
+        raise NotImplementedError
+
+    def _feed_page(self, reply):
+        raise NotImplementedError
+
+
+class ListPager(Pager):
+    """Fetches a list by LRANGE windows"""
+
+    length_command = "llen"
+
+    def __init__(self, redis, key, size=PAGE_SIZE):
+        super().__init__(redis, key, size)
+        self.start = 0
+
+    def _queue_page(self, pipe):
+        pipe.lrange(self.key, self.start, self.start + self.size - 1)
+
+    def _feed_page(self, reply):
+        self.start += len(reply)
+        self.done = len(reply) < self.size
+        self.raw = reply
+        return [(decode(i, self.key),) for i in reply]
+
+
+class ScanPager(Pager):
+    """
+    Fetches a hash, set or zset with the corresponding SCAN cursor.
+    Elements are reported only once even if the server returns them in
+    more than one page (which can happen when the key is rehashed).
+    """
+
+    scan_command = None
+
+    def __init__(self, redis, key, size=PAGE_SIZE):
+        super().__init__(redis, key, size)
+        self.cursor = 0
+        self._seen = set()
+
+    def _queue_page(self, pipe):
+        getattr(pipe, self.scan_command)(self.key, self.cursor, count=self.size)
+
+    def _feed_page(self, reply):
+        self.cursor, data = reply
+        self.done = self.cursor == 0
+        rows, self.raw = [], []
+        for raw, row in self._rows(data):
+            if raw not in self._seen:
+                self._seen.add(raw)
+                self.raw.append(raw)
+                rows.append(row)
+        return rows
+
+    def _rows(self, data):
+        """[(raw element, row)]"""
+        raise NotImplementedError
+
+
+class HashPager(ScanPager):
+
+    length_command = "hlen"
+    scan_command = "hscan"
+
+    def _rows(self, data):
+        key = self.key
+        return [(k, (decode(k, key), decode(v, key))) for k, v in data.items()]
+
+
+class SetPager(ScanPager):
+
+    length_command = "scard"
+    scan_command = "sscan"
+
+    def _rows(self, data):
+        return [(i, (decode(i, self.key),)) for i in data]
+
+
+class ZSetPager(Pager):
+    """
+    Fetches a sorted set in score order, as (member, float score) rows.
+
+    The whole set is fetched by ZRANGE WITHSCORES rank windows. Only the
+    members with a score between *min* and *max* are fetched by
+    ZRANGEBYSCORE pages starting at the last score fetched, skipping
+    the members of that score already fetched.
+    """
+
+    def __init__(self, redis, key, size=PAGE_SIZE, min="-inf", max="+inf"):
+        super().__init__(redis, key, size)
+        self.min = min
+        self.max = max
+        self.by_score = (min, max) != ("-inf", "+inf")
+        self.start = min if self.by_score else 0
+        # members with the score *start* already fetched (by score)
+        self.ties = 0
+
+    def restart(self):
+        return type(self)(self.redis, self.key, self.size, self.min, self.max)
+
+    def queue(self, pipe):
+        key = self.key
+        if self.by_score:
+            pipe.zcount(key, self.min, self.max)
+            pipe.zrangebyscore(
+                key, self.start, self.max, self.ties, self.size, withscores=True
+            )
+        else:
+            pipe.zcard(key)
+            pipe.zrange(key, self.start, self.start + self.size - 1, withscores=True)
+
+    def _feed_page(self, reply):
+        self.done = len(reply) < self.size
+        if not self.by_score:
+            self.start += len(reply)
+        elif reply:
+            last = reply[-1][1]
+            ties = sum(1 for _, score in reply if score == last)
+            self.ties = self.ties + ties if last == self.start else ties
+            self.start = last
+        self.raw = [member for member, _ in reply]
+        return [(decode(member, self.key), score) for member, score in reply]
+
+
+class StreamPager(Pager):
+    """Fetches a stream by XRANGE with COUNT"""
+
+    length_command = "xlen"
+
+    def __init__(self, redis, key, size=PAGE_SIZE):
+        super().__init__(redis, key, size)
+        self.start = "-"
+
+    def _queue_page(self, pipe):
+        pipe.xrange(self.key, min=self.start, count=self.size)
+
+    def _feed_page(self, reply):
+        self.done = len(reply) < self.size
+        if reply:
+            ms, seq = reply[-1][0].decode().split("-")
+            self.start = f"{ms}-{int(seq) + 1}"
+        return _decode_stream(reply, self.key)
+
+
+PAGERS = {
+    "list": ListPager,
+    "hash": HashPager,
+    "set": SetPager,
+    "zset": ZSetPager,
+    "stream": StreamPager,
+}
 
 
 class QRedis(QObject):
 
     keyRenamed = Signal(object, object)
-    keysDeleted = Signal()
+    keysRenamed = Signal(object)
+    keysCreated = Signal(object)
+    keysDeleted = Signal(object)
+    keysChanged = Signal(object)
+    #: key, chunks written, total chunks (see write_value)
+    writeProgress = Signal(object, int, int)
 
     TYPE_MAP = {
         type(None): "none",
@@ -90,27 +629,31 @@ class QRedis(QObject):
         # kwargs.setdefault("decode_responses", True)
         super(QRedis, self).__init__(parent)
 
+        # dtype: (queue value fetch commands in pipeline, decode reply)
         self._get_type_map = {
-            "none": lambda v: None,
-            "string": self._get,
-            "hash": self._hgetall,
-            "list": self._lgetall,
-            "set": self._sgetall,
-            "zset": self._zgetall,
-            "stream": self._xrange,
+            "string": (lambda p, k: p.get(k), load),
+            "hash": (lambda p, k: p.hgetall(k), _decode_hash),
+            "list": (lambda p, k: p.lrange(k, 0, -1), _decode_list),
+            "set": (lambda p, k: p.smembers(k), _decode_set),
+            "zset": (lambda p, k: p.zrange(k, 0, -1, withscores=True), _decode_zset),
+            "stream": (lambda p, k: p.xrange(k), _decode_stream),
         }
 
+        # anything else is written as a string
         self._set_type_map = collections.defaultdict(
-            lambda: lambda r, k, v: _set(r.redis, k, v),
+            lambda: self.write_value,
             {
                 type(None): lambda k, v: self.delete(k),
-                dict: lambda k, v: self.redis.hmset(k, v),
-                list: lambda k, v: _set_list(self.redis, k, v),
-                set: lambda k, v: _set_set(self.redis, k, v),
+                CollectionEdit: self.apply_edit,
             },
         )
 
         self.redis = Redis(*args, **kwargs)
+        #: limits the rate of the bulk operations (bulk executor tasks)
+        self.throttle = Throttle(self.redis, parent=self)
+        self.executor = Executor(throttle=self.throttle, parent=self)
+        self._identity = None
+        self._server_info = None
 
     def __getattr__(self, name):
         return getattr(self.redis, name)
@@ -123,63 +666,417 @@ class QRedis(QObject):
 
     def __setitem__(self, key, value):
         self._set_type_map[type(value)](key, value)
+        self.keysChanged.emit((key,))
 
     def __delitem__(self, key):
         self.delete(key)
 
-    def _get(self, key):
-        return decode(self.redis.get(key))
+    def _fetch(self, key, dtype=None, meta=False, paged=False):
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.type(key)
+        pipe.pttl(key)
+        if meta:
+            pipe.memory_usage(key)
+            pipe.object("encoding", key)
+        pager = None
+        if paged and dtype in PAGERS:
+            pager = PAGERS[dtype](self, key)
+            pager.queue(pipe)
+        elif dtype in self._get_type_map:
+            self._get_type_map[dtype][0](pipe, key)
+        # optional commands (ex: MEMORY on redis < 4) may fail
+        return pipe.execute(raise_on_error=False), pager
 
-    def _hgetall(self, key):
-        return {decode(k): decode(v) for k, v in self.redis.hgetall(key).items()}
+    def get(self, key, default=None, dtype=None, meta=False, paged=False):
+        """
+        Fetch key type, TTL and value. Metadata is fetched in a single
+        pipeline. If *dtype* (the expected key type) is given the value
+        is fetched in the same round trip. With *meta*, memory usage and
+        internal encoding are also fetched.
+        With *paged*, the value of a collection is a :class:`Pager`
+        holding only its first page.
+        """
+        reply, pager = self._fetch(key, dtype, meta, paged)
+        rtype, pttl = reply[0].decode(), reply[1]
+        if rtype == "none":
+            return default
+        if rtype != dtype:
+            # type was unknown (or changed meanwhile): 2nd round trip
+            reply, pager = self._fetch(key, rtype, meta, paged)
+            rtype, pttl = reply[0].decode(), reply[1]
+            if rtype == "none":
+                return default
+        if pager is None:
+            value = reply[-1]
+            if isinstance(value, Exception):
+                raise value
+            value = self._get_type_map[rtype][1](value, key)
+        else:
+            for result in reply[-2:]:
+                if isinstance(result, Exception):
+                    raise result
+            pager.feed(*reply[-2:])
+            value = pager
+        ttl = -1 if pttl is None or pttl < 0 else (pttl + 500) // 1000
+        extra = {}
+        if meta:
+            memory, encoding = reply[2:4]
+            if not isinstance(memory, Exception):
+                extra["memory"] = memory
+            if isinstance(encoding, bytes):
+                extra["encoding"] = encoding.decode()
+        return KeyItem(self, key, rtype, ttl, value, **extra)
 
-    def _lgetall(self, key):
-        return [decode(i) for i in self.redis.lrange(key, 0, -1)]
+    @property
+    def identity(self):
+        """(client id, client name) of the connection (fetched once)"""
+        if self._identity is None:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.client_id()
+            pipe.client_getname()
+            self._identity = tuple(pipe.execute())
+        return self._identity
 
-    def _sgetall(self, key):
-        return {decode(i) for i in self.redis.smembers(key)}
+    def server_info(self, refresh=False):
+        """INFO server section (fetched once unless *refresh*)"""
+        if self._server_info is None or refresh:
+            self._server_info = self.redis.info("server")
+        return self._server_info
 
-    def _zgetall(self, key):
-        return {
-            decode(member): decode(score)
-            for member, score in self.redis.zscan_iter(key)
-        }
-
-    def _xrange(self, key):
-        data = []
-        for i in self.redis.xrange(key):
-            event_time, event_data_raw = i
-            event_time = decode(event_time)
-            event_data = {
-                decode(member): decode(score)
-                for member, score in event_data_raw.items()
-            }
-            data.append((event_time, event_data))
-        return data
-    
-    def get(self, key, default=None):
-        if not self.exists(key):
-            return default
-        dtype, ttl = self.type(key), self.ttl(key)
-        ttl = -1 if ttl is None else ttl  # handle redis < 2.8
-        value = self._get_type_map[dtype](key)
-        return KeyItem(self, key, dtype, ttl, value)
+    @property
+    def version(self):
+        """redis server version as a tuple of ints (ex: (6, 2, 14))"""
+        version = self.server_info()["redis_version"]
+        return tuple(int(i) for i in version.split("."))
 
     def type(self, name):
         return self.redis.type(name).decode()
 
     def keys(self, pattern):
-        return [k.decode() for k in self.redis.keys(pattern)]
+        return [k.decode() for k in self.redis.scan_iter(pattern)]
+
+    def scan_keys(self, cursor=0, pattern="*", count=None):
+        """One SCAN step. Returns the next cursor (0 when done) and the keys"""
+        cursor, keys = self.redis.scan(cursor, match=pattern, count=count)
+        self.throttle.spend(1)
+        return cursor, [k.decode() for k in keys]
+
+    def apply_edit(self, key, edit, check=True):
+        """
+        Write only the changes of a :class:`CollectionEdit` (HSET/HDEL,
+        SADD/SREM, ZADD/ZREM or LSET/LINSERT/LREM) in a single MULTI/EXEC
+        transaction. With *check* (optimistic concurrency) the key is
+        WATCHed and the elements changed must still hold the values they
+        had when loaded (and a list its length), otherwise WatchError is
+        raised and nothing is written.
+
+        An edit of more than *WRITE_CHUNK* elements is applied to a copy
+        of the key, a few bounded commands per round trip, which is then
+        RENAMEd over it (see :meth:`write_value`).
+        """
+        write, check_edit, read = EDIT_COMMANDS[edit.type]
+        with self.redis.pipeline() as pipe:
+            if check:
+                pipe.watch(key)
+                # read on another connection: the WATCH covers the writes
+                # happening from now on
+                reader = self.redis.pipeline(transaction=False)
+                expected, decoded = check_edit(reader, key, edit)
+                if expected:
+                    if decoded(reader.execute()) != expected:
+                        raise WatchError(f"{key!r} changed since it was loaded")
+            raw = None
+            if read is not None:
+                # rows are displayed decoded: never write them back as such
+                reader = self.redis.pipeline(transaction=False)
+                raw = read(reader, key, edit)(reader.execute())
+            if _edit_size(edit) > WRITE_CHUNK:
+                # too big for a single transaction: apply it to a copy
+                # (still under WATCH)
+                commands = _Commands()
+                write(commands, key, edit, raw)
+                self._write_copy(pipe, key, commands)
+                return
+            pipe.multi()
+            write(pipe, key, edit, raw)
+            pipe.execute()
+
+    def write_value(self, key, value, chunk=WRITE_CHUNK):
+        """
+        Replace the value of *key* with *value* (str, bytes, list, set,
+        dict or zset; anything else is written as a string), keeping its
+        TTL. A value bigger than one chunk (*chunk* elements or 1 MiB of a
+        string) is built under a temporary key, a few bounded commands per
+        round trip, and then RENAMEd over *key*: readers see the old or
+        the new value, never a partial one, and the server is never
+        blocked by a huge command. Progress is reported through
+        *writeProgress*.
+        """
+        with self.redis.pipeline() as pipe:
+            self._write_value(pipe, key, value, chunk)
+
+    def _write_value(self, pipe, key, value, chunk):
+        split, queue = VALUE_WRITERS.get(type(value), VALUE_WRITERS[str])
+        parts = split(value, chunk)
+        # pipe is in immediate mode when WATCHing
+        ttl = (pipe if pipe.watching else self.redis).pttl(key)
+        if len(parts) <= 1:
+            pipe.multi()
+            pipe.delete(key)
+            if parts:  # no part: empty collection
+                queue(pipe, key, parts[0])
+                _queue_ttl(pipe, key, ttl)
+            pipe.execute()
+            return
+        commands = _Commands()
+        for part in parts:
+            queue(commands, key, part)
+        self._write_tmp(pipe, key, ttl, commands)
+
+    def _write_copy(self, pipe, key, commands):
+        """Apply the commands (writing *key*) to a copy of *key*"""
+        ttl = (pipe if pipe.watching else self.redis).pttl(key)
+        self._write_tmp(pipe, key, ttl, commands, copy=True)
+
+    def _write_tmp(self, pipe, key, ttl, commands, copy=False):
+        """
+        Send the commands (writing *key*) to a temporary key instead, a
+        few per round trip, then RENAME it over *key* (with *ttl*)
+        """
+        tmp = f"qredis:tmp:{uuid.uuid4()}"
+        commands = commands.queued
+        total = len(commands)
+        try:
+            if copy:
+                if self.version >= (6, 2):
+                    self.redis.copy(key, tmp)
+                else:
+                    dump = self.redis.dump(key)
+                    if dump is not None:
+                        self.redis.restore(tmp, 0, dump)
+                self.redis.expire(tmp, TMP_TTL)
+            for start in range(0, total, WRITE_PIPELINE):
+                batch = self.redis.pipeline(transaction=False)
+                for name, args, kwargs in commands[start : start + WRITE_PIPELINE]:
+                    getattr(batch, name)(tmp, *args[1:], **kwargs)
+                batch.expire(tmp, TMP_TTL)
+                batch.execute()
+                self.writeProgress.emit(key, min(start + WRITE_PIPELINE, total), total)
+            # removing all elements of a collection deletes it
+            exists = self.redis.exists(tmp)
+            pipe.multi()
+            if self.version >= (4,):
+                # the old value is freed in the background
+                pipe.unlink(key)
+            else:
+                pipe.delete(key)
+            if exists:
+                pipe.rename(tmp, key)
+                _queue_ttl(pipe, key, ttl)
+            pipe.execute()
+        except BaseException:
+            self.redis.delete(tmp)
+            raise
 
     def has_key(self, key):
         return self.exists(key)
 
     def delete(self, *keys):
         self.redis.delete(*keys)
-        self.keysDeleted.emit()
+        self.keysDeleted.emit(keys)
 
     def rename(self, old_key, new_key):
-        old_item = self[old_key]
         self.redis.rename(old_key, new_key)
-        new_item = self[new_key]
-        self.keyRenamed.emit(old_item, new_item)
+        self.keyRenamed.emit(old_key, new_key)
+
+    def expire(self, key, ttl):
+        self.redis.expire(key, ttl)
+        self.keysChanged.emit((key,))
+
+    def persist(self, key):
+        self.redis.persist(key)
+        self.keysChanged.emit((key,))
+
+    def xadd(self, key, fields, id="*", **kwargs):
+        """Add an entry to a stream. Returns its ID"""
+        entry_id = self.redis.xadd(key, fields, id=id, **kwargs)
+        self.keysChanged.emit((key,))
+        return entry_id.decode()
+
+    def xdel(self, key, *ids):
+        """Delete stream entries. Returns the number of entries deleted"""
+        deleted = self.redis.xdel(key, *ids)
+        self.keysChanged.emit((key,))
+        return deleted
+
+    def xtrim(self, key, maxlen=None, approximate=True, minid=None):
+        """
+        Trim a stream to its *maxlen* newest entries or to the entries
+        with an ID of at least *minid* (redis >= 6.2). With *approximate*
+        (~) whole nodes are evicted, which is much cheaper. Returns the
+        number of entries deleted
+        """
+        deleted = self.redis.xtrim(key, maxlen, approximate, minid)
+        self.keysChanged.emit((key,))
+        return deleted
+
+    def last_entries(self, key, count):
+        """The last *count* entries of a stream (oldest first), decoded"""
+        return _decode_stream(self.redis.xrevrange(key, count=count)[::-1], key)
+
+    def read_entries(self, key, last_id="$", count=None, block=None):
+        """
+        Entries of a stream added after *last_id* (XREAD), waiting at most
+        *block* ms for them when there are none yet, decoded
+        """
+        reply = self.redis.xread({key: last_id}, count=count, block=block)
+        return _decode_stream(reply[0][1], key) if reply else []
+
+    def stream_groups(self, key):
+        """
+        Consumer groups of a stream (XINFO GROUPS) with their consumers
+        (XINFO CONSUMERS) and pending entries (XPENDING), as a list of
+        :class:`StreamGroup`
+        """
+        groups = self.redis.xinfo_groups(key)
+        pipe = self.redis.pipeline(transaction=False)
+        for group in groups:
+            pipe.xinfo_consumers(key, group["name"])
+            pipe.xpending(key, group["name"])
+        replies = pipe.execute()
+        result = []
+        for group, consumers, pending in zip(groups, replies[::2], replies[1::2]):
+            consumers = [
+                StreamConsumer(c["name"].decode(), c["pending"], c["idle"])
+                for c in consumers
+            ]
+            first, last = pending["min"], pending["max"]
+            result.append(
+                StreamGroup(
+                    group["name"].decode(),
+                    consumers,
+                    pending["pending"],
+                    group["last-delivered-id"].decode(),
+                    first.decode() if first else None,
+                    last.decode() if last else None,
+                )
+            )
+        return result
+
+    def same_server(self, other):
+        """True if *other* (a QRedis) is connected to the same server"""
+        mine = self.connection_pool.connection_kwargs
+        theirs = other.connection_pool.connection_kwargs
+        return all(mine.get(k) == theirs.get(k) for k in ("host", "port", "path"))
+
+    def copy_keys(self, keys, target=None, replace=False):
+        """
+        Server side copy of the {source key: destination key} *keys* to
+        *target* (a QRedis, by default this one). Values never go through
+        python: COPY is used on the same server (redis >= 6.2), DUMP +
+        RESTORE (TTL included) otherwise, each in a single pipeline.
+        Existing destination keys are only overwritten with *replace*.
+        Returns, for each key, True if copied, False if the source key
+        doesn't exist or the destination does, or the error.
+        """
+        target = self if target is None else target
+        if self.same_server(target) and self.version >= (6, 2):
+            db = target.connection_pool.connection_kwargs.get("db", 0)
+            if db == self.connection_pool.connection_kwargs.get("db", 0):
+                db = None
+            pipe = self.redis.pipeline(transaction=False)
+            for src, dst in keys.items():
+                pipe.copy(src, dst, destination_db=db, replace=replace)
+            reply = pipe.execute(raise_on_error=False)
+            self.throttle.spend(len(reply))
+            return reply
+        pipe = self.redis.pipeline(transaction=False)
+        for src in keys:
+            pipe.dump(src)
+            pipe.pttl(src)
+        reply = pipe.execute(raise_on_error=False)
+        self.throttle.spend(len(reply))
+        result = [False] * len(keys)
+        pipe = target.redis.pipeline(transaction=False)
+        queued = []
+        dumps = zip(keys.values(), reply[::2], reply[1::2])
+        for i, (dst, dump, pttl) in enumerate(dumps):
+            if isinstance(dump, Exception):
+                result[i] = dump
+            elif dump is not None:  # None: the source key doesn't exist
+                pipe.restore(dst, max(pttl, 0), dump, replace=replace)
+                queued.append(i)
+        if queued:
+            reply = pipe.execute(raise_on_error=False)
+            target.throttle.spend(len(reply))
+            for i, restored in zip(queued, reply):
+                if not isinstance(restored, Exception):
+                    result[i] = True
+                elif "BUSYKEY" not in str(restored):
+                    result[i] = restored
+        return result
+
+    def memory_stats(self, keys, samples=5):
+        """
+        Memory used (as reported by MEMORY USAGE, nested values estimated
+        from *samples* elements), type and length of many keys in two
+        pipelined round trips. Returns a list of (key, type, bytes,
+        length). Keys which don't exist are skipped.
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.type(key)
+            pipe.memory_usage(key, samples=samples)
+        reply = pipe.execute()
+        self.throttle.spend(len(reply))
+        pipe = self.redis.pipeline(transaction=False)
+        queued = []
+        for key, dtype, nbytes in zip(keys, reply[::2], reply[1::2]):
+            dtype = dtype.decode()
+            if nbytes is None or dtype not in META_COMMANDS:
+                continue
+            META_COMMANDS[dtype][0](pipe, key)
+            queued.append((key, dtype, nbytes))
+        reply = pipe.execute(raise_on_error=False)
+        self.throttle.spend(len(reply))
+        return [
+            (key, dtype, nbytes, 0 if isinstance(length, Exception) else length)
+            for (key, dtype, nbytes), length in zip(queued, reply)
+        ]
+
+    def meta(self, keys, preview=PREVIEW_SIZE, preview_bytes=PREVIEW_BYTES):
+        """
+        Fetch type, TTL, size and a short preview of the value (at most
+        *preview_bytes* bytes of a string or *preview* elements of a
+        collection) of many keys in two pipelined round trips. Returns a dict of
+        :class:`~qredis.util.KeyMeta`. Keys which don't exist are skipped.
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.type(key)
+            pipe.pttl(key)
+        reply = pipe.execute()
+        self.throttle.spend(len(reply))
+        types = [dtype.decode() for dtype in reply[::2]]
+        pttls = reply[1::2]
+        pipe = self.redis.pipeline(transaction=False)
+        queued = []
+        for key, dtype, pttl in zip(keys, types, pttls):
+            if dtype not in META_COMMANDS:
+                continue
+            size, sample, _ = META_COMMANDS[dtype]
+            size(pipe, key)
+            sample(pipe, key, preview_bytes if dtype == "string" else preview)
+            queued.append((key, dtype, pttl))
+        reply = pipe.execute(raise_on_error=False)
+        self.throttle.spend(len(reply))
+        now = time.monotonic()
+        result = {}
+        for i, (key, dtype, pttl) in enumerate(queued):
+            size, sample = reply[2 * i : 2 * i + 2]
+            if isinstance(size, Exception) or isinstance(sample, Exception):
+                continue  # key changed type or was deleted meanwhile
+            sample = META_COMMANDS[dtype][2](sample)
+            ttl = -1 if pttl is None or pttl < 0 else pttl / 1000
+            result[key] = KeyMeta(key, dtype, ttl, size, sample, now)
+        return result
@@ -0,0 +1,211 @@
+"""
+Search over key names.
+
+A :class:`KeyIndex` is a snapshot of the (sorted) keys. Prefix queries
+are answered with bisect. The other queries scan the keys joined by
+newlines with a compiled regular expression: the regular expression
+engine skips the keys which can't match at C speed, so only the matching
+keys cost python code. The keys are joined in chunks, built on demand,
+so that a search runs in short steps which can be interrupted.
+"""
+
+import re
+import bisect
+
+#: search modes
+MODES = ("contains", "prefix", "glob", "regex", "fuzzy")
+
+
+def glob_regex(pattern):
+    """
+    Regular expression source of a redis glob-style *pattern* (to be
+    compiled with re.DOTALL) and the longest literal part of the pattern
+    """
+    result, literal, longest = [], "", ""
+    i, n = 0, len(pattern)
+    while i < n:
+        char = pattern[i]
+        i += 1
+        if char == "\\" and i < n:
+            char = pattern[i]
+            i += 1
+        elif char in "*?":
+            result.append(".*" if char == "*" else ".")
+            longest, literal = max(longest, literal, key=len), ""
+            continue
+        elif char == "[":
+            end = pattern.find("]", i + 1)
+            if end >= 0:
+                chars = pattern[i:end]
+                i = end + 1
+                negate = chars.startswith("^")
+                if negate:
+                    chars = chars[1:]
+                chars = chars.replace("\\", "\\\\").replace("]", "\\]")
+                result.append(f"[^{chars}]" if negate else f"[{chars}]")
+                longest, literal = max(longest, literal, key=len), ""
+                continue
+        result.append(re.escape(char))
+        literal += char
+    return "".join(result), max(longest, literal, key=len)
+
+
+def glob_prefix(pattern):
+    """The prefix of a glob-style *pattern* of the form "prefix*" or None"""
+    if not pattern.endswith("*"):
+        return None
+    prefix = pattern[:-1]
+    if any(char in prefix for char in "*?[\\"):
+        return None
+    return prefix
+
+
+def fuzzy_regex(text):
+    """Regular expression source matching the characters of *text* in order"""
+    return "[^\n]*?".join(re.escape(char) for char in text)
+
+
+class KeyQuery:
+    """
+    A compiled search. *mode* is one of :data:`MODES`:
+
+    * contains: keys containing the text
+    * prefix: keys starting with the text
+    * glob: keys matching the redis glob-style pattern
+    * regex: keys where the regular expression matches (anywhere)
+    * fuzzy: keys containing the characters of the text, in order
+
+    Raises re.error on an invalid regular expression.
+    """
+
+    def __init__(self, text, mode="contains"):
+        if mode not in MODES:
+            raise ValueError(f"unknown search mode {mode!r}")
+        if mode == "glob":
+            prefix = glob_prefix(text)
+            if prefix is not None:
+                mode, text = "prefix", prefix
+        self.text = text
+        self.mode = mode
+        #: regular expression keys must match as a whole (glob)
+        self.check = None
+        if mode == "contains":
+            source = re.escape(text)
+        elif mode == "glob":
+            # search for the literal part (fast) then check the candidates
+            source, literal = glob_regex(text)
+            self.check = re.compile(source, re.DOTALL)
+            source = re.escape(literal) if literal else "^"
+        elif mode == "regex":
+            source = text
+        elif mode == "fuzzy":
+            source = fuzzy_regex(text)
+        else:
+            source = None
+        self.regex = None if source is None else re.compile(source, re.MULTILINE)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.text!r}, mode={self.mode!r})"
+
+    def match(self, key):
+        if self.regex is None:
+            return key.startswith(self.text)
+        elif self.check is not None:
+            return self.check.fullmatch(key) is not None
+        return self.regex.search(key) is not None
+
+    def narrows(self, other):
+        """
+        True if the keys matching this query are a subset of the ones
+        matching *other* (the results of *other* can then be filtered)
+        """
+        if other is None or other.mode != self.mode:
+            return False
+        if self.mode == "prefix":
+            return self.text.startswith(other.text)
+        elif self.mode == "contains":
+            return other.text in self.text
+        elif self.mode == "fuzzy":
+            return self.text.startswith(other.text)
+        return self.text == other.text
+
+
+class KeyIndex:
+    """Snapshot of the sorted *keys* which can be searched"""
+
+    #: number of keys per chunk of text
+    CHUNK_SIZE = 20_000
+
+    def __init__(self, keys):
+        self.keys = tuple(keys)
+        self._chunks = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def nb_chunks(self):
+        return -(-len(self.keys) // self.CHUNK_SIZE)
+
+    def chunk(self, index):
+        """
+        Keys of the given chunk joined by newlines (None if a key of the
+        chunk contains a newline)
+        """
+        if index not in self._chunks:
+            start = index * self.CHUNK_SIZE
+            keys = self.keys[start : start + self.CHUNK_SIZE]
+            text = "\n".join(keys)
+            if text.count("\n") != len(keys) - 1:
+                text = None
+            self._chunks[index] = text
+        return self._chunks[index]
+
+    def prefix(self, prefix, limit):
+        """(number of keys starting with *prefix*, the first *limit* ones)"""
+        keys = self.keys
+        start = bisect.bisect_left(keys, prefix)
+        if prefix:
+            upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+            stop = bisect.bisect_left(keys, upper, start)
+        else:
+            stop = len(keys)
+        return stop - start, list(keys[start : min(stop, start + limit)])
+
+    def scan(self, query, start, stop, limit):
+        """
+        Search the chunks [start, stop). Returns the number of matching
+        keys and the first *limit* ones.
+        """
+        count, found = 0, []
+        for index in range(start, min(stop, self.nb_chunks)):
+            text = self.chunk(index)
+            if text is None:
+                first = index * self.CHUNK_SIZE
+                for key in self.keys[first : first + self.CHUNK_SIZE]:
+                    if query.match(key):
+                        count += 1
+                        if len(found) < limit:
+                            found.append(key)
+                continue
+            search, find, rfind = query.regex.search, text.find, text.rfind
+            check = query.check
+            pos, size = 0, len(text)
+            while pos <= size:
+                match = search(text, pos)
+                if match is None:
+                    break
+                begin = rfind("\n", 0, match.start()) + 1
+                end = find("\n", begin)
+                if end < 0:
+                    end = size
+                pos = end + 1
+                # a match spanning several keys: check the first key alone
+                if match.end() > end and search(text[begin:end]) is None:
+                    continue
+                if check is not None and check.fullmatch(text, begin, end) is None:
+                    continue
+                count += 1
+                if len(found) < limit:
+                    found.append(text[begin:end])
+        return count, found
@@ -0,0 +1,354 @@
+"""Qt table models of redis collection values and arrays"""
+
+import logging
+import collections
+
+import numpy
+from qtpy.QtCore import (
+    Qt,
+    Signal,
+    QModelIndex,
+    QAbstractListModel,
+    QAbstractTableModel,
+)
+
+from .redis import Pager, CollectionEdit
+
+
+class CollectionModel(QAbstractTableModel):
+    """
+    Table model of a collection value (list, set, hash or zset).
+
+    Cells are stored column-wise (one python list per column) and only
+    turned into Qt values when the view asks for them. Columns may have
+    a type (ex: float for zset scores): their cells are edited as text
+    and converted back, invalid text is refused. When the value is
+    a :class:`~qredis.redis.Pager`, following pages are fetched in the
+    background when the view reaches the last loaded row
+    (see :meth:`canFetchMore` / :meth:`fetchMore`).
+
+    The rows as loaded are kept aside, with the raw redis element each
+    was decoded from, so that :meth:`edit` can tell which rows were
+    changed, added or removed since.
+    """
+
+    edited = Signal()
+    rowsLoaded = Signal()
+
+    def __init__(self, header=("Value",), types=None, parent=None):
+        super().__init__(parent)
+        self.header = tuple(header)
+        self.types = tuple(types or len(self.header) * [None])
+        self.columns = [[] for _ in self.header]
+        #: rows as loaded (and the raw redis element of each one, if known)
+        #: and, for each current row, the index of the loaded row it comes
+        #: from (None for new rows)
+        self.original = []
+        self.raw = []
+        self.origins = []
+        self.pager = None
+        self.__task = None
+
+    def set_header(self, header, types=None):
+        self.beginResetModel()
+        self.header = tuple(header)
+        self.types = tuple(types or len(self.header) * [None])
+        self.columns = [[] for _ in self.header]
+        self.original, self.raw, self.origins = [], [], []
+        self.endResetModel()
+
+    def set_value(self, value):
+        """
+        Set model contents from a python collection (list, set or dict)
+        or from a pager (only the rows already fetched are taken)
+        """
+        if self.__task is not None:
+            self.__task.cancel()
+            self.__task = None
+        raw = ()
+        if isinstance(value, Pager):
+            pager, rows = value.first_page()
+            if rows:
+                raw = pager.raw
+        elif isinstance(value, dict):
+            pager, rows = None, value.items()
+        else:
+            pager, rows = None, ((v,) for v in value)
+        self.beginResetModel()
+        self.pager = pager
+        self.columns = [[] for _ in self.header]
+        self.original, self.raw, self.origins = [], [], []
+        self.__extend(rows, raw)
+        self.endResetModel()
+        self.rowsLoaded.emit()
+
+    def __extend(self, rows, raw=()):
+        columns, original, origins = self.columns, self.original, self.origins
+        start = len(original)
+        for row in rows:
+            origins.append(len(original))
+            original.append(tuple(row))
+            for column, cell in zip(columns, row):
+                column.append(cell)
+        self.raw.extend(raw)
+        self.raw.extend((len(original) - start - len(raw)) * [None])
+
+    def rows(self):
+        """Iterator over the loaded rows (tuples)"""
+        return zip(*self.columns)
+
+    def edit(self, dtype):
+        """:class:`~qredis.redis.CollectionEdit` of the rows loaded so far"""
+        complete = self.pager is None or self.pager.done
+        length = len(self.original) if complete else self.pager.length
+        rows = list(zip(self.origins, self.rows()))
+        original, raw = list(self.original), list(self.raw)
+        return CollectionEdit(dtype, original, rows, length, complete, raw)
+
+    @property
+    def length(self):
+        """total number of rows, including the ones not fetched yet"""
+        if self.pager is None or self.pager.done:
+            return self.rowCount()
+        return self.pager.length
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.columns[0])
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.header)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.header[section]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role in {Qt.DisplayRole, Qt.EditRole, Qt.ToolTipRole}:
+            cell = self.columns[index.column()][index.row()]
+            return cell if self.types[index.column()] is None else str(cell)
+        elif role == Qt.TextAlignmentRole and self.types[index.column()] is not None:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not index.isValid():
+            return False
+        kind = self.types[index.column()]
+        if kind is not None:
+            try:
+                value = kind(value)
+            except ValueError:
+                return False
+        self.columns[index.column()][index.row()] = value
+        self.dataChanged.emit(index, index, [role])
+        self.edited.emit()
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+
+    def insertRows(self, row, count, parent=QModelIndex()):
+        self.beginInsertRows(parent, row, row + count - 1)
+        for column, kind in zip(self.columns, self.types):
+            column[row:row] = count * ["" if kind is None else kind()]
+        self.origins[row:row] = count * [None]
+        self.endInsertRows()
+        self.edited.emit()
+        return True
+
+    def removeRows(self, row, count, parent=QModelIndex()):
+        self.beginRemoveRows(parent, row, row + count - 1)
+        for column in self.columns:
+            del column[row : row + count]
+        del self.origins[row : row + count]
+        self.endRemoveRows()
+        self.edited.emit()
+        return True
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.pager is None:
+            return False
+        return not self.pager.done and self.__task is None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        pager = self.pager
+        self.__task = pager.redis.executor.submit(
+            pager.next_page,
+            callback=self.__on_page_loaded,
+            errback=self.__on_error,
+            bulk=True,
+        )
+
+    def __on_page_loaded(self, rows):
+        self.__task = None
+        if not rows:
+            # a scan step may not return new elements: keep going
+            self.fetchMore()
+        else:
+            start = self.rowCount()
+            self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+            self.__extend(rows, self.pager.raw)
+            self.endInsertRows()
+        self.rowsLoaded.emit()
+
+    def __on_error(self, error):
+        self.__task = None
+        logging.error("error fetching page of %r", self.pager, exc_info=error)
+
+
+class StreamModel(QAbstractListModel):
+    """
+    List model of stream entries ((ID, {field: value}), shown by ID).
+
+    With a *cap* it is a ring buffer: appending beyond the cap drops the
+    oldest rows, so that a stream can be followed forever. Entries set
+    with a :class:`~qredis.redis.Pager` are fetched page by page in the
+    background like the rows of a :class:`CollectionModel`.
+    """
+
+    rowsLoaded = Signal()
+
+    def __init__(self, cap=None, parent=None):
+        super().__init__(parent)
+        self.entries = collections.deque(maxlen=cap)
+        self.pager = None
+        self.__task = None
+
+    @property
+    def cap(self):
+        return self.entries.maxlen
+
+    def set_cap(self, cap):
+        drop = 0 if cap is None else max(0, len(self.entries) - cap)
+        if drop:
+            self.beginRemoveRows(QModelIndex(), 0, drop - 1)
+        self.entries = collections.deque(self.entries, maxlen=cap)
+        if drop:
+            self.endRemoveRows()
+
+    def clear(self):
+        self.set_entries(())
+
+    def set_entries(self, entries, pager=None):
+        """
+        Set the entries (the ones already fetched by *pager* if given, the
+        following ones are fetched when the view reaches the last row)
+        """
+        if self.__task is not None:
+            self.__task.cancel()
+            self.__task = None
+        self.beginResetModel()
+        self.pager = pager
+        self.entries.clear()
+        self.entries.extend(entries)
+        self.endResetModel()
+
+    def append(self, entries):
+        """Append entries (the oldest rows beyond the cap are dropped)"""
+        cap = self.cap
+        if cap is not None:
+            entries = entries[-cap:]
+            drop = len(self.entries) + len(entries) - cap
+            if drop > 0:
+                self.beginRemoveRows(QModelIndex(), 0, drop - 1)
+                for _ in range(drop):
+                    self.entries.popleft()
+                self.endRemoveRows()
+        if entries:
+            start = len(self.entries)
+            self.beginInsertRows(QModelIndex(), start, start + len(entries) - 1)
+            self.entries.extend(entries)
+            self.endInsertRows()
+
+    def remove(self, ids):
+        """Remove the entries of the given IDs"""
+        ids = set(ids)
+        for row in reversed(range(len(self.entries))):
+            if self.entries[row][0] in ids:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.entries[row]
+                self.endRemoveRows()
+
+    def entry(self, row):
+        return self.entries[row]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return self.entries[index.row()][0]
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.pager is None:
+            return False
+        return not self.pager.done and self.__task is None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        pager = self.pager
+        self.__task = pager.redis.executor.submit(
+            pager.next_page,
+            callback=self.__on_page_loaded,
+            errback=self.__on_error,
+            bulk=True,
+        )
+
+    def __on_page_loaded(self, entries):
+        self.__task = None
+        self.append(entries)
+        self.rowsLoaded.emit()
+
+    def __on_error(self, error):
+        self.__task = None
+        logging.error("error fetching page of %r", self.pager, exc_info=error)
+
+
+class ArrayModel(QAbstractTableModel):
+    """
+    Read-only table model of a numpy array. 1D arrays are shown as a
+    column, N-D arrays as a 2D view (the trailing dimensions flattened).
+    Only the cells the view asks for are converted to text.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.array = None
+        self.shape = (0, 0)
+
+    def set_array(self, array):
+        self.beginResetModel()
+        if array is None:
+            self.array, self.shape = None, (0, 0)
+        else:
+            # reshape of a contiguous array is a view (no copy)
+            rows = array.shape[0] if array.ndim else 1
+            array = array.reshape(rows, int(numpy.prod(array.shape[1:])))
+            self.array, self.shape = array, array.shape
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.shape[0]
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.shape[1]
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            return str(section)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in {Qt.DisplayRole, Qt.ToolTipRole}:
+            return str(self.array[index.row(), index.column()])
+        elif role == Qt.TextAlignmentRole:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
@@ -0,0 +1,125 @@
+"""Live tail of a redis stream (XREAD BLOCK)"""
+
+import time
+import logging
+import threading
+import collections
+
+from qtpy.QtCore import QObject, QTimer, Signal
+
+
+#: throughput of a :class:`StreamTail` (see *StreamTail.statsChanged*):
+#: entries *received* in total, *rate* in entries per second and
+#: entries *dropped* (received but never delivered)
+TailStats = collections.namedtuple("TailStats", "received rate dropped")
+
+
+class StreamTail(QObject):
+    """
+    Follows the new entries of the stream *key* with XREAD BLOCK on a
+    dedicated thread (starting with its *backlog* last entries).
+
+    Entries are buffered and delivered in the GUI thread through
+    *entriesAdded* at a fixed frame rate (*fps*), so that thousands of
+    entries per second result in a few batches. The buffer keeps at
+    most *cap* entries: when the GUI can't keep up, or while paused,
+    the oldest are dropped.
+    """
+
+    entriesAdded = Signal(object)
+    statsChanged = Signal(object)
+    error = Signal(object)
+
+    #: max ms an XREAD waits for entries (and so to notice a stop)
+    BLOCK = 500
+
+    def __init__(self, qredis, key, cap=10_000, backlog=100, fps=10, count=1000):
+        super().__init__(qredis)
+        self.qredis = qredis
+        self.key = key
+        self.backlog = backlog
+        self.count = count
+        self.received = 0
+        self.dropped = 0
+        self.rate = 0.0
+        self.paused = False
+        self._lock = threading.Lock()
+        self._pending = collections.deque(maxlen=cap)
+        self._thread = None
+        self._stop = None
+        self._rate_time = time.monotonic()
+        self._rate_received = 0
+        self._timer = QTimer(self)
+        self._timer.setInterval(1000 // fps)
+        self._timer.timeout.connect(self._flush)
+        self.error.connect(self.stop)
+
+    def is_running(self):
+        return self._thread is not None
+
+    def stats(self):
+        return TailStats(self.received, self.rate, self.dropped)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(self._stop,), name="redis-tail", daemon=True
+        )
+        self._thread.start()
+        self._timer.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread = None
+        self._timer.stop()
+        with self._lock:
+            self._pending.clear()
+
+    def pause(self, paused=True):
+        """Hold the delivery of entries (they keep being received)"""
+        self.paused = paused
+
+    def _run(self, stop):
+        qredis, key = self.qredis, self.key
+        try:
+            last_id = "$"
+            if self.backlog:
+                entries = qredis.last_entries(key, self.backlog)
+                last_id = entries[-1][0] if entries else "0-0"
+                self._push(entries)
+            while not stop.is_set():
+                entries = qredis.read_entries(key, last_id, self.count, self.BLOCK)
+                if entries and not stop.is_set():
+                    last_id = entries[-1][0]
+                    self._push(entries)
+        except Exception as error:
+            if not stop.is_set():
+                logging.error("stream tail of %r stopped: %r", key, error)
+                self.error.emit(error)
+
+    def _push(self, entries):
+        with self._lock:
+            pending = self._pending
+            self.received += len(entries)
+            self.dropped += max(0, len(pending) + len(entries) - pending.maxlen)
+            pending.extend(entries)
+
+    def _flush(self):
+        now = time.monotonic()
+        with self._lock:
+            received = self.received
+            if self.paused:
+                entries = []
+            else:
+                entries = list(self._pending)
+                self._pending.clear()
+        if now - self._rate_time >= 1.0:
+            self.rate = (received - self._rate_received) / (now - self._rate_time)
+            self._rate_time, self._rate_received = now, received
+            self.statsChanged.emit(self.stats())
+        if entries:
+            self.entriesAdded.emit(entries)
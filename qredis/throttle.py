@@ -0,0 +1,143 @@
+"""
+Rate limiting of the bulk operations (key scans, value pages, analyzers)
+so that browsing never hurts the latency of a production server.
+"""
+
+import time
+import logging
+import threading
+import collections
+
+from qtpy.QtCore import QObject, Signal
+
+
+#: snapshot of a :class:`Throttle` (see *Throttle.stateChanged*)
+ThrottleState = collections.namedtuple(
+    "ThrottleState", "rate factor latency ops busy delay"
+)
+
+
+class Throttle(QObject):
+    """
+    Token bucket of *rate* commands per second (0 means no limit).
+
+    Bulk operations are charged after the fact with :meth:`spend` (from
+    the I/O thread) and the following ones are delayed by :meth:`delay`
+    until the debt is paid, so the average rate stays within budget
+    without ever blocking the I/O thread.
+
+    While limiting, the server is probed every *interval* seconds with
+    INFO stats: the latency of the probe and the commands per second
+    run by the other clients (instantaneous_ops_per_sec minus our own)
+    drive an adaptive backoff. When the latency goes above *slowdown*
+    times the best latency of the last minute or the other clients run
+    more than *busy_ops* commands per second (0 to ignore), the rate is
+    halved (down to *min_factor*), otherwise it recovers step by step.
+    """
+
+    stateChanged = Signal(object)
+
+    #: best latency is taken over this number of probes
+    HISTORY = 60
+    #: latency below which the server is never considered slow (s)
+    MIN_LATENCY = 0.001
+
+    def __init__(
+        self,
+        redis,
+        rate=0,
+        busy_ops=0,
+        interval=1.0,
+        slowdown=3.0,
+        min_factor=1 / 64,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.redis = redis
+        self.busy_ops = busy_ops
+        self.interval = interval
+        self.slowdown = slowdown
+        self.min_factor = min_factor
+        self._lock = threading.Lock()
+        self._latencies = collections.deque(maxlen=self.HISTORY)
+        self._rate = rate
+        self.factor = 1.0
+        self.latency = None
+        self.ops = None
+        self.busy = False
+        self._tokens = 0.0
+        self._last = time.monotonic()
+        self._probed = self._last
+        self._spent = 0
+
+    @property
+    def rate(self):
+        return self._rate
+
+    @rate.setter
+    def rate(self, rate):
+        with self._lock:
+            self._rate = rate
+            self._tokens = min(self._tokens, 0.0)
+            self.factor = 1.0
+        self.stateChanged.emit(self.state())
+
+    @property
+    def limit(self):
+        """current commands per second allowed (0 means no limit)"""
+        return self._rate * self.factor
+
+    def state(self):
+        return ThrottleState(
+            self._rate, self.factor, self.latency, self.ops, self.busy, self.delay()
+        )
+
+    def _refill(self, now):
+        limit = self.limit
+        # a burst of at most 1/10 s worth of commands
+        self._tokens = min(limit / 10, self._tokens + (now - self._last) * limit)
+        self._last = now
+
+    def delay(self):
+        """Seconds to wait before the next bulk operation"""
+        with self._lock:
+            if not self._rate:
+                return 0.0
+            self._refill(time.monotonic())
+            return max(0.0, -self._tokens / self.limit)
+
+    def spend(self, cost):
+        """Charge *cost* commands (called from the I/O thread)"""
+        if not self._rate:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._refill(now)
+            self._tokens -= cost
+            self._spent += cost
+            probe = now - self._probed >= self.interval
+        if probe:
+            self._probe(now)
+
+    def _probe(self, start):
+        try:
+            stats = self.redis.info("stats")
+        except Exception as error:
+            logging.warning("error probing redis load: %r", error)
+            return
+        now = time.monotonic()
+        latency = now - start
+        with self._lock:
+            own = self._spent / (start - self._probed)
+            self._spent, self._probed = 0, now
+            latencies = self._latencies
+            latencies.append(latency)
+            ops = max(0, stats.get("instantaneous_ops_per_sec", 0) - own)
+            slow = latency > max(self.slowdown * min(latencies), self.MIN_LATENCY)
+            busy = slow or (self.busy_ops > 0 and ops > self.busy_ops)
+            if busy:
+                self.factor = max(self.min_factor, self.factor / 2)
+            else:
+                self.factor = min(1.0, self.factor + 1 / 8)
+            self.latency, self.ops, self.busy = latency, ops, busy
+        self.stateChanged.emit(self.state())
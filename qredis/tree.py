@@ -1,9 +1,22 @@
 import os
+import re
+import sys
+import time
+import bisect
+import fnmatch
 import logging
 import functools
+import collections
 
 from qtpy.QtCore import (
-    Qt, Signal, QModelIndex, QAbstractItemModel, QSortFilterProxyModel)
+    Qt,
+    Signal,
+    QModelIndex,
+    QAbstractItemModel,
+    QAbstractListModel,
+    QTimer,
+    QPoint,
+)
 from qtpy.QtGui import QIcon
 from qtpy.QtWidgets import (
     QMainWindow,
@@ -12,11 +25,24 @@ from qtpy.QtWidgets import (
     QMessageBox,
     QInputDialog,
     QMenu,
+    QLabel,
+    QSpinBox,
+    QProgressBar,
 )
 
-from .util import KeyItem as Item, redis_str
+from .util import KeyItem as Item, KeySplitter, glob_escape, redis_str
 from .qutil import ui_loadable
-from .redis import QRedis
+from .connection import get_redis
+from .keyspace import (
+    KeyspaceWatcher,
+    REMOVE_EVENTS,
+    notify_flags,
+    enable_notifications,
+)
+from .search import MODES, KeyIndex, KeyQuery
+from .worker import Executor
+from .bulk import BulkOperation
+from .dialog import CopyDialog
 
 
 _this_dir = os.path.dirname(__file__)
@@ -30,35 +56,91 @@ KeyNameRole = Qt.UserRole + 1
 
 
 class Node:
-    __slots__ = ["name", "full_name", "key", "parent", "children", "items"]
+    """
+    Key tree node. Children are kept sorted by name in two parallel lists
+    (names, for bisect lookup, and nodes). Name segments are interned so
+    that the segments repeated across keys are stored only once. Each node
+    remembers its row in the parent which makes :meth:`row` O(1) (rows
+    are renumbered lazily after the parent children change).
+
+    Children are only created when the node is expanded (*fetched*).
+    *folder* tells if there are keys below the node.
+    """
+
+    __slots__ = ["name", "key", "parent", "names", "items", "_row", "fetched", "folder"]
 
-    def __init__(self, name, full_name, key=None, parent=None, children=None):
-        self.name = name
-        self.full_name = full_name
+    def __init__(self, name, key=None, parent=None, folder=False):
+        self.name = None if name is None else sys.intern(name)
         self.key = key
         self.parent = parent
-        self.children = children or {}
-        self.items = list(self.children)
+        self.names = []
+        self.items = []
+        self._row = 0
+        self.fetched = False
+        self.folder = folder
 
     def __setitem__(self, name, node):
-        self.children[name] = node
-        self.items.append(name)
+        self.insert(name, node)
+
+    def insert(self, name, node):
+        """Insert a child keeping children sorted. Returns the new row"""
+        row = bisect.bisect(self.names, name)
+        self.names.insert(row, node.name)
+        self.items.insert(row, node)
+        node._row = row
+        return row
+
+    def remove(self, name):
+        """Remove a child. Returns the row it had"""
+        row = self[name].row()
+        del self.names[row]
+        del self.items[row]
+        return row
+
+    def find(self, name):
+        """Row of the child with the given name or -1 if there is none"""
+        names = self.names
+        row = bisect.bisect_left(names, name)
+        if row < len(names) and names[row] == name:
+            return row
+        return -1
+
+    def row(self):
+        items = self.parent.items
+        row = self._row
+        if row >= len(items) or items[row] is not self:
+            for i, node in enumerate(items):
+                node._row = i
+            row = self._row
+        return row
+
+    @property
+    def full_name(self):
+        if self.key is not None:
+            return self.key
+        names, node = [], self
+        while not node.is_db():
+            names.append(node.name)
+            node = node.parent
+        # names start with the separator which precedes them
+        return "".join(reversed(names))
 
     def __getitem__(self, name_or_index):
         if isinstance(name_or_index, int):
-            name = self.items[name_or_index]
-        else:
-            name = name_or_index
-        return self.children[name]
+            return self.items[name_or_index]
+        row = self.find(name_or_index)
+        if row < 0:
+            raise KeyError(name_or_index)
+        return self.items[row]
 
     def __len__(self):
-        return len(self.children)
+        return len(self.items)
 
     def __repr__(self):
         if self.is_key():
-            return f"KeyNode(key={self.key}, children={self.items})"
+            return f"KeyNode(key={self.key}, children={self.names})"
         else:
-            return f"Node(name={self.name}, children={self.items})"
+            return f"Node(name={self.name}, children={self.names})"
 
     def is_db(self):
         return False
@@ -73,6 +155,17 @@ class Node:
 
 class RedisNode(Node):
 
+    __slots__ = ["long_name", "redis"]
+
+    def __init__(self, name, long_name, redis, parent=None):
+        super().__init__(name, parent=parent, folder=True)
+        self.long_name = long_name
+        self.redis = redis
+
+    @property
+    def full_name(self):
+        return self.long_name
+
     def is_db(self):
         return True
 
@@ -80,44 +173,662 @@ class RedisNode(Node):
         return f"Redis(name={self.name})"
 
 
-def tree(redis, keys, sep):
+def tree(redis):
+    """Root of an (empty, not fetched yet) tree of the given redis"""
     name, long_name = redis_str(redis)
-    root = Node(None, None)
-    rnode = RedisNode(name, long_name, parent=root)
-    rnode.redis = redis
+    root = Node(None)
+    root.fetched = True
+    rnode = RedisNode(name, long_name, redis, parent=root)
     root[name] = rnode
-    for key in keys:
-        parts = key.split(sep)
-        parent = rnode
-        partial = []
-        for part in parts:
-            partial.append(part)
-            try:
-                node = parent[part]
-            except KeyError:
-                full_name = sep.join(partial)
-                node = Node(part, full_name, parent=parent)
-                parent[part] = node
-            parent = node
-        node.key = key
     return root
 
 
+def _upper(prefix):
+    """smallest string greater than all strings starting with prefix"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def key_range(keys, prefix):
+    """(start, stop) slice of the sorted *keys* starting with *prefix*"""
+    if not prefix:
+        return 0, len(keys)
+    start = bisect.bisect_left(keys, prefix)
+    return start, bisect.bisect_left(keys, _upper(prefix), start)
+
+
+def has_keys(keys, prefix):
+    """True if any of the sorted *keys* starts with *prefix*"""
+    start, stop = key_range(keys, prefix)
+    return start < stop
+
+
+def is_folder(keys, prefix, splitter):
+    """True if any of the sorted *keys* is below the folder *prefix*"""
+    return any(has_keys(keys, prefix + sep) for sep in splitter.prefixes)
+
+
+def folder_size(keys, prefix, splitter):
+    """Number of the sorted *keys* below the folder *prefix*"""
+    size = 0
+    for sep in splitter.prefixes:
+        start, stop = key_range(keys, prefix + sep)
+        size += stop - start
+    return size
+
+
+def children(keys, prefix, splitter, top=False):
+    """
+    Direct children of the folder *prefix* in the sorted *keys* list (all
+    the keys if *top*). Returns a sorted list of (name, key or None, is
+    folder). Names start with the separator which precedes them (see
+    :class:`~qredis.util.KeySplitter`).
+
+    Whole sub-folders are skipped with bisect, so the cost depends on the
+    number of children and not on the number of keys below them.
+    """
+    start, stop = key_range(keys, prefix)
+    firsts = {sep[0] for sep in splitter.separators}
+    depth = len(splitter.split(prefix)) if splitter.overlapping and not top else 0
+    result = {}
+    offset = len(prefix)
+    i = start
+    while i < stop:
+        key = keys[i]
+        if top:
+            begin = offset
+        else:
+            match = splitter.match(key, offset)
+            if match is None:
+                # the folder key itself, a separator prefix ("a:x" when
+                # the separator is "::") or a sibling sharing the prefix
+                # ("ab:c" next to "a:b"): skip all keys starting the same
+                if len(key) == offset or key[offset] in firsts:
+                    i += 1
+                else:
+                    i = bisect.bisect_left(keys, _upper(key[: offset + 1]), i, stop)
+                continue
+            begin = match.end()
+            if depth and "".join(splitter.split(key)[:depth]) != prefix:
+                # a separator spans the end of the prefix in this key
+                i += 1
+                continue
+        match = splitter.search(key, begin)
+        if match is None:
+            name = key[offset:]
+            result.setdefault(name, [None, False])[0] = key
+            i += 1
+        else:
+            name = key[offset : match.start()]
+            result.setdefault(name, [None, False])[1] = True
+            folder = key[: match.end()]
+            i = bisect.bisect_left(keys, _upper(folder), i, stop)
+    return sorted((name, key, folder) for name, (key, folder) in result.items())
+
+
+def sorted_diff(old, new):
+    """
+    Compare two sorted sequences of unique items with a single merge pass.
+    Returns the lists of items removed and added
+    """
+    removed, added = [], []
+    i = j = 0
+    n_old, n_new = len(old), len(new)
+    while i < n_old and j < n_new:
+        a, b = old[i], new[j]
+        if a == b:
+            i += 1
+            j += 1
+        elif a < b:
+            removed.append(a)
+            i += 1
+        else:
+            added.append(b)
+            j += 1
+    removed.extend(old[i:])
+    added.extend(new[j:])
+    return removed, added
+
+
+def _diff_keys(old, new):
+    return sorted_diff(sorted(old), sorted(set(new)))
+
+
+class MetaCache:
+    """
+    Bounded LRU cache of key metadata (:class:`~qredis.util.KeyMeta`).
+    Entries older than *max_age* seconds are considered stale.
+    """
+
+    def __init__(self, capacity=10_000, max_age=30):
+        self.capacity = capacity
+        self.max_age = max_age
+        self._data = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def get(self, key):
+        meta = self._data.get(key)
+        if meta is None:
+            return None
+        if time.monotonic() - meta.time > self.max_age:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return meta
+
+    def update(self, metas):
+        data = self._data
+        for key, meta in metas.items():
+            data[key] = meta
+            data.move_to_end(key)
+        while len(data) > self.capacity:
+            data.popitem(last=False)
+
+    def invalidate(self, keys=None):
+        """Forget the given keys (all keys if None)"""
+        if keys is None:
+            self._data.clear()
+        else:
+            for key in keys:
+                self._data.pop(key, None)
+
+
 class RedisKeyModel(QAbstractItemModel):
 
-    def __init__(self, qredis, filter="*", sep=":"):
+    loadStarted = Signal()
+    loadProgress = Signal(int)
+    loadFinished = Signal()
+    liveError = Signal(object)
+    keysChanged = Signal()
+
+    #: SCAN COUNT hint: number of keys the server inspects per batch
+    SCAN_COUNT = 1000
+
+    #: maximum number of keys per metadata request
+    META_BATCH = 200
+
+    #: browse mode: maximum number of keys sampled for the top level
+    BROWSE_LIMIT = 10_000
+
+    #: max number of new keys inserted one by one in the sorted keys
+    #: (more are merged with a single sort)
+    INSORT_MAX = 256
+
+    def __init__(
+        self, qredis, filter="*", sep=":", scan_count=SCAN_COUNT, browse=False
+    ):
         super().__init__()
         self.qredis = qredis
         self.filter = filter
-        self.separator = sep
+        if not isinstance(sep, KeySplitter):
+            sep = KeySplitter(sep)
+        self.splitter = sep
+        self.scan_count = scan_count
+        self.browse = browse
+        #: browse mode: {folder name (None for the db): [SCAN cursor, keys found]}
+        self._scans = {}
         self._key_icon = QIcon(_key_icon)
         self._redis_icon = QIcon(_redis_icon)
         self._folder_icon = QIcon(_folder_icon)
+        self._cursor = None
+        self._nb_keys = 0
+        #: all keys (sorted). Tree nodes are created from it on demand
+        self.keys = []
+        self._pending = []
+        self._scanned = None
+        self._scan_group = ("scan", id(self))
+        self.meta_cache = MetaCache()
+        self._meta_pending = set()
+        self.watcher = None
+        #: {key: exists} changes made through qredis, applied in batches
+        self._changes = {}
+        self._changes_timer = QTimer(self)
+        self._changes_timer.setSingleShot(True)
+        self._changes_timer.setInterval(300)
+        self._changes_timer.timeout.connect(self._apply_changes)
+        qredis.keysChanged.connect(self.invalidate_meta)
+        qredis.keysDeleted.connect(self._on_keys_deleted)
+        qredis.keyRenamed.connect(self._on_key_renamed)
+        qredis.keysRenamed.connect(self._on_keys_renamed)
+        qredis.keysCreated.connect(self._on_keys_created)
         self._refresh()
 
     def _refresh(self):
-        keys = sorted(self.qredis.keys(self.filter))
-        self.tree = tree(self.qredis, keys, self.separator)
+        self.meta_cache.invalidate()
+        self.tree = tree(self.qredis)
+        self.keys = []
+        self._scans = {}
+        self.keysChanged.emit()
+        if not self.browse:
+            self._start_loading()
+
+    def _start_loading(self, diff=False):
+        self._cursor = 0
+        self._nb_keys = 0
+        # on diff, keys are collected and only the differences applied
+        self._scanned = [] if diff else None
+        self._load_next_batch()
+        self.loadStarted.emit()
+
+    def _stop_loading(self):
+        self.qredis.executor.cancel(self._scan_group)
+        self._cursor = None
+        self._scanned = None
+        self._pending = []
+        for prefix, scan in self._scans.items():
+            if scan[0] is not None:
+                self.qredis.executor.cancel(("browse", id(self), prefix))
+                scan[0] = None
+
+    def _load_next_batch(self):
+        self.qredis.executor.submit(
+            self.qredis.scan_keys,
+            self._cursor,
+            self.filter,
+            self.scan_count,
+            callback=self._on_batch_loaded,
+            errback=self._on_load_error,
+            group=self._scan_group,
+            bulk=True,
+        )
+
+    def _on_batch_loaded(self, result):
+        cursor, keys = result
+        if self._scanned is None:
+            # merging into the sorted key list is O(n): do it only when
+            # the batches collected are a significant part of it
+            pending = self._pending
+            pending.extend(keys)
+            if cursor == 0 or 4 * len(pending) >= len(self.keys):
+                self._pending = []
+                self.insert_keys(pending)
+        else:
+            self._scanned.extend(keys)
+        self._nb_keys += len(keys)
+        self.loadProgress.emit(self._nb_keys)
+        if cursor == 0:
+            if self._scanned is None:
+                self._cursor = None
+                self.loadFinished.emit()
+            else:
+                scanned, self._scanned = self._scanned, None
+                self.qredis.executor.submit(
+                    _diff_keys,
+                    list(self.keys),
+                    scanned,
+                    callback=self._on_diff,
+                    errback=self._on_load_error,
+                    group=self._scan_group,
+                )
+        else:
+            self._cursor = cursor
+            self._load_next_batch()
+
+    def _on_diff(self, diff):
+        removed, added = diff
+        self.remove_keys(removed)
+        self.insert_keys(added)
+        self._cursor = None
+        self.loadFinished.emit()
+
+    def _on_load_error(self, error):
+        logging.error("error scanning keys: %r", error)
+        self._cursor = None
+        self._scanned = None
+        self.loadFinished.emit()
+
+    def is_loading(self):
+        if self._cursor is not None:
+            return True
+        return any(scan[0] is not None for scan in self._scans.values())
+
+    def _is_scanned(self, prefix):
+        for scanned, (cursor, nb_keys) in self._scans.items():
+            if scanned is None:
+                # the top level may be only a sample of the keys
+                if cursor is None and nb_keys < self.BROWSE_LIMIT:
+                    return True
+            elif prefix is not None and prefix.startswith(scanned):
+                return True
+        return False
+
+    def browse_folder(self, prefix):
+        """
+        Browse mode: SCAN the keys of the given folder (keys starting with
+        *prefix*, the whole db if None) unless a SCAN of one of its parents
+        covers them already. The tree is updated as batches arrive.
+        """
+        if self._is_scanned(prefix):
+            return
+        if prefix is None:
+            pattern = self.filter
+        else:
+            pattern = glob_escape(prefix) + "*"
+        self._scans[prefix] = [0, 0]
+        self._browse_next(prefix, pattern)
+        self.loadStarted.emit()
+
+    def _browse_next(self, prefix, pattern):
+        self.qredis.executor.submit(
+            self.qredis.scan_keys,
+            self._scans[prefix][0],
+            pattern,
+            self.scan_count,
+            callback=functools.partial(self._on_browse_batch, prefix, pattern),
+            errback=functools.partial(self._on_browse_error, prefix),
+            group=("browse", id(self), prefix),
+            bulk=True,
+        )
+
+    def _on_browse_batch(self, prefix, pattern, result):
+        cursor, keys = result
+        if prefix is not None and self.filter != "*":
+            keys = [key for key in keys if fnmatch.fnmatchcase(key, self.filter)]
+        self.insert_keys(keys)
+        scan = self._scans[prefix]
+        scan[1] += len(keys)
+        self.loadProgress.emit(len(self.keys))
+        if cursor == 0 or (prefix is None and scan[1] >= self.BROWSE_LIMIT):
+            scan[0] = None
+            if not self.is_loading():
+                self.loadFinished.emit()
+        else:
+            scan[0] = cursor
+            self._browse_next(prefix, pattern)
+
+    def _on_browse_error(self, prefix, error):
+        logging.error("error scanning keys of %r: %r", prefix, error)
+        self._scans[prefix][0] = None
+        if not self.is_loading():
+            self.loadFinished.emit()
+
+    def key_count(self, node):
+        """Number of keys below the given node (loaded so far)"""
+        if node.is_db():
+            return len(self.keys)
+        return folder_size(self.keys, node.full_name, self.splitter)
+
+    def _counts_changed(self):
+        """Repaint the fetched folders (their key count changed)"""
+        nodes = [self.tree[0]]
+        while nodes:
+            node = nodes.pop()
+            items = node.items
+            if items:
+                first = self.createIndex(0, 0, items[0])
+                last = self.createIndex(len(items) - 1, 0, items[-1])
+                self.dataChanged.emit(first, last, [Qt.DisplayRole])
+                nodes.extend(item for item in items if item.fetched)
+
+    def _contains(self, key):
+        keys = self.keys
+        i = bisect.bisect_left(keys, key)
+        return i < len(keys) and keys[i] == key
+
+    def _node_index(self, node):
+        return self.createIndex(node.row(), 0, node)
+
+    def insert_keys(self, keys):
+        keys = [key for key in sorted(set(keys)) if not self._contains(key)]
+        if not keys:
+            return
+        if len(keys) <= self.INSORT_MAX:
+            # a few keys (ex: keyspace events): no need to sort all keys
+            for key in keys:
+                bisect.insort(self.keys, key)
+        else:
+            # 2 sorted runs: the sort merges them in linear time
+            self.keys.extend(keys)
+            self.keys.sort()
+        if self.tree[0].fetched:
+            for key in keys:
+                self._insert_path(key)
+            self._counts_changed()
+        self.keysChanged.emit()
+
+    def insert_key(self, key):
+        self.insert_keys((key,))
+
+    def _insert_path(self, key):
+        """Update the already fetched nodes on the path of a new key"""
+        names = self.splitter.split(key)
+        last = len(names) - 1
+        node = self.tree[0]
+        for i, name in enumerate(names):
+            if not node.fetched:
+                return
+            is_key = i == last
+            row = node.find(name)
+            if row < 0:
+                child = Node(
+                    name, key=key if is_key else None, parent=node, folder=not is_key
+                )
+                row = bisect.bisect(node.names, name)
+                self.beginInsertRows(self._node_index(node), row, row)
+                node.insert(name, child)
+                self.endInsertRows()
+            else:
+                child = node.items[row]
+                # folder becomes a key as well or key becomes a folder
+                changed = child.key is None if is_key else not child.folder
+                if changed:
+                    if is_key:
+                        child.key = key
+                    else:
+                        child.folder = True
+                    index = self._node_index(child)
+                    self.dataChanged.emit(index, index)
+            node = child
+
+    def remove_keys(self, keys):
+        keys = [key for key in set(keys) if self._contains(key)]
+        if not keys:
+            return
+        if len(keys) < 100:
+            for key in keys:
+                del self.keys[bisect.bisect_left(self.keys, key)]
+        else:
+            gone = set(keys)
+            self.keys = [key for key in self.keys if key not in gone]
+        if self.tree[0].fetched:
+            for key in keys:
+                self._remove_path(key)
+            self._counts_changed()
+        self.keysChanged.emit()
+
+    def remove_key(self, key):
+        self.remove_keys((key,))
+
+    def _remove_path(self, key):
+        """
+        Update the already fetched nodes on the path of a removed key:
+        nodes left without keys are removed
+        """
+        keys, splitter = self.keys, self.splitter
+        node, prefix, path = self.tree[0], "", []
+        for name in splitter.split(key):
+            if not node.fetched:
+                break
+            row = node.find(name)
+            if row < 0:
+                break
+            node = node.items[row]
+            prefix += name
+            path.append((node, prefix))
+        for node, prefix in reversed(path):
+            if node.key == key:
+                node.key = None
+            node.folder = is_folder(keys, prefix, splitter)
+            if node.key is None and not node.folder:
+                parent, row = node.parent, node.row()
+                self.beginRemoveRows(self._node_index(parent), row, row)
+                parent.remove(node.name)
+                self.endRemoveRows()
+            else:
+                index = self._node_index(node)
+                self.dataChanged.emit(index, index)
+                break
+
+    def apply_events(self, events):
+        """
+        Apply a batch of keyspace events ({key: last event}) to the tree
+        """
+        removed = [key for key, event in events.items() if event in REMOVE_EVENTS]
+        self.remove_keys(removed)
+        self.insert_keys(
+            key for key, event in events.items() if event not in REMOVE_EVENTS
+        )
+        self.invalidate_meta(list(events))
+
+    def is_live(self):
+        return self.watcher is not None and self.watcher.is_running()
+
+    def set_live(self, live):
+        """
+        Live mode: keep the tree up to date with the redis keyspace
+        notifications (see :class:`~qredis.keyspace.KeyspaceWatcher`)
+        """
+        if live:
+            if self.watcher is None:
+                self.watcher = KeyspaceWatcher(self.qredis, self.filter)
+                self.watcher.keysChanged.connect(self.apply_events)
+                self.watcher.overflow.connect(self.refresh)
+                self.watcher.error.connect(self.liveError)
+            self.watcher.start()
+        elif self.watcher is not None:
+            self.watcher.stop()
+
+    def key_index(self, key):
+        """
+        Model index of the given key (invalid index if the key is not in
+        the tree or its folder was not fetched yet)
+        """
+        node = self.tree[0]
+        for name in self.splitter.split(key):
+            if not node.fetched:
+                break
+            row = node.find(name)
+            if row < 0:
+                break
+            node = node.items[row]
+        else:
+            if node.key == key:
+                return self.createIndex(node.row(), 0, node)
+        return QModelIndex()
+
+    def prefetch_meta(self, keys):
+        """Fetch in the background the metadata of keys not in cache"""
+        cache, pending = self.meta_cache, self._meta_pending
+        keys = [key for key in keys if key not in pending and key not in cache]
+        for i in range(0, len(keys), self.META_BATCH):
+            batch = keys[i : i + self.META_BATCH]
+            pending.update(batch)
+            self.qredis.executor.submit(
+                self.qredis.meta,
+                batch,
+                callback=functools.partial(self._on_meta_loaded, batch),
+                errback=functools.partial(self._on_meta_error, batch),
+                bulk=True,
+            )
+
+    def _on_meta_loaded(self, keys, metas):
+        self._meta_pending.difference_update(keys)
+        self.meta_cache.update(metas)
+        for key in keys:
+            index = self.key_index(key)
+            if index.isValid():
+                self.dataChanged.emit(index, index, [Qt.ToolTipRole])
+
+    def _on_meta_error(self, keys, error):
+        self._meta_pending.difference_update(keys)
+        logging.error("error fetching keys metadata", exc_info=error)
+
+    def key_tooltip(self, key):
+        meta = self.meta_cache.get(key)
+        if meta is None:
+            self.prefetch_meta((key,))
+            return f"name: {key}\n(loading...)"
+        return meta.toolTip()
+
+    def invalidate_meta(self, keys=None):
+        self.meta_cache.invalidate(keys)
+
+    def _on_key_renamed(self, old_key, new_key):
+        self._on_keys_renamed({old_key: new_key})
+
+    def _on_keys_renamed(self, renamed):
+        changes = self._changes
+        for old_key, new_key in renamed.items():
+            changes[old_key] = False
+            changes[new_key] = True
+        self.invalidate_meta([*renamed, *renamed.values()])
+        self._schedule_changes()
+
+    def _on_keys_created(self, keys):
+        self._changes.update(dict.fromkeys(keys, True))
+        self.invalidate_meta(keys)
+        self._schedule_changes()
+
+    def _on_keys_deleted(self, keys):
+        self._changes.update(dict.fromkeys(keys, False))
+        self.invalidate_meta(keys)
+        self._schedule_changes()
+
+    def _schedule_changes(self):
+        # not postponed by further changes: a long bulk operation still
+        # shows its progress in the tree
+        if not self._changes_timer.isActive():
+            self._changes_timer.start()
+
+    def _apply_changes(self):
+        """Apply the key changes collected since the last time at once"""
+        changes, self._changes = self._changes, {}
+        self.remove_keys(key for key, exists in changes.items() if not exists)
+        self.insert_keys(
+            key
+            for key, exists in changes.items()
+            if exists and fnmatch.fnmatchcase(key, self.filter)
+        )
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return True
+        node = parent.internalPointer()
+        return node.folder or bool(node.items)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return False
+        node = parent.internalPointer()
+        return not node.fetched and node.folder
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        node = parent.internalPointer()
+        if node.is_db():
+            prefix = None
+            entries = children(self.keys, "", self.splitter, top=True)
+        else:
+            prefix = node.full_name
+            entries = children(self.keys, prefix, self.splitter)
+        node.fetched = True
+        if self.browse:
+            # keys found by the SCAN are added as they arrive
+            self.browse_folder(prefix)
+        if not entries:
+            return
+        self.beginInsertRows(parent, 0, len(entries) - 1)
+        for row, (name, key, folder) in enumerate(entries):
+            child = Node(name, key=key, parent=node, folder=folder)
+            child._row = row
+            node.names.append(child.name)
+            node.items.append(child)
+        self.endInsertRows()
 
     def columnCount(self, parent=QModelIndex()):
         return 1
@@ -130,7 +841,12 @@ class RedisKeyModel(QAbstractItemModel):
             return len(self.tree)
 
     def data(self, index, role=Qt.DisplayRole):
-        if role in {Qt.DisplayRole, Qt.AccessibleTextRole}:
+        if role == Qt.DisplayRole:
+            node = index.internalPointer()
+            if node.folder and not node.is_db():
+                return f"{node.name} ({self.key_count(node)})"
+            return node.name
+        elif role == Qt.AccessibleTextRole:
             return index.internalPointer().name
         elif role == Qt.DecorationRole:
             node = index.internalPointer()
@@ -143,8 +859,7 @@ class RedisKeyModel(QAbstractItemModel):
         elif role == Qt.ToolTipRole:
             node = index.internalPointer()
             if node.is_key():
-                key_item = node.key_item(self.qredis)
-                return "?" if key_item is None else key_item.toolTip()
+                return self.key_tooltip(node.key)
             else:
                 return node.full_name
         elif role == NodeRole:
@@ -158,9 +873,11 @@ class RedisKeyModel(QAbstractItemModel):
                 return node.key
 
     def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
         if parent.isValid():
             parent_node = parent.internalPointer()
-            node = parent_node[row - 1]
+            node = parent_node[row]
         else:
             node = self.tree[row]
         return self.createIndex(row, column, node)
@@ -173,8 +890,7 @@ class RedisKeyModel(QAbstractItemModel):
         grandparent = parent.parent
         if grandparent is None:
             return QModelIndex()
-        row = grandparent.items.index(parent.name)
-        return self.createIndex(row, 0, parent)
+        return self.createIndex(parent.row(), 0, parent)
 
     def flags(self, index):
         if not index.isValid():
@@ -187,6 +903,29 @@ class RedisKeyModel(QAbstractItemModel):
         return value
 
     def refresh(self):
+        """
+        Reload the keys. Only the differences with the current keys are
+        applied to the tree (expansion and selection are kept).
+        In browse mode the tree is rebuilt.
+        """
+        if self.browse:
+            self.reset()
+            return
+        self._stop_loading()
+        self.meta_cache.invalidate()
+        self._start_loading(diff=True)
+
+    def set_browse(self, browse):
+        """
+        Browse mode: instead of loading all keys, SCAN only the keys of
+        the folders being expanded
+        """
+        self.browse = browse
+        self.reset()
+
+    def reset(self):
+        """Rebuild the tree from scratch"""
+        self._stop_loading()
         self.beginResetModel()
         try:
             self._refresh()
@@ -194,27 +933,186 @@ class RedisKeyModel(QAbstractItemModel):
             self.endResetModel()
 
 
+class KeySearchModel(QAbstractListModel):
+    """
+    Flat list of the keys of a :class:`RedisKeyModel` matching a search
+    (see :mod:`qredis.search`).
+
+    Searches (CPU bound) run on their own executor, so that they never
+    delay the redis commands, in steps of a few chunks of keys: results
+    show up while the search goes on and a new search cancels the
+    previous one. When the previous results are complete, a search
+    narrowing them (more text typed) just filters them.
+    """
+
+    #: number of matching keys (so far), search finished
+    searchProgress = Signal(int, bool)
+    searchError = Signal(object)
+
+    #: maximum number of keys listed (all matches are counted)
+    LIMIT = 10_000
+
+    #: chunks of keys (see KeyIndex.CHUNK_SIZE) searched per step
+    STEP = 5
+
+    #: delay (ms) before searching again when the keys change
+    REFRESH_DELAY = 1000
+
+    #: executor of the searches of all models (created on first use)
+    _executor = None
+
+    def __init__(self, key_model, parent=None):
+        super().__init__(parent)
+        self.key_model = key_model
+        self.query = None
+        self.results = []
+        self.count = 0
+        self.done = True
+        self._index = None
+        self._searched = None
+        self._group = ("search", id(self))
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(self.REFRESH_DELAY)
+        self._refresh_timer.timeout.connect(self._search_again)
+        key_model.keysChanged.connect(self._on_keys_changed)
+
+    @property
+    def executor(self):
+        cls = KeySearchModel
+        if cls._executor is None:
+            cls._executor = Executor(name="key-search")
+        return cls._executor
+
+    def _on_keys_changed(self):
+        self._index = None
+        if self.query is not None:
+            self._refresh_timer.start()
+
+    def _search_again(self):
+        if self.query is not None:
+            self.search(self.query.text, self.query.mode)
+
+    def search(self, text, mode="contains"):
+        """Search the keys matching *text* (see :class:`~qredis.search.KeyQuery`)"""
+        self.executor.cancel(self._group)
+        self._refresh_timer.stop()
+        if not text:
+            self.clear()
+            return
+        try:
+            query = KeyQuery(text, mode)
+        except re.error as error:
+            self.clear()
+            self.searchError.emit(error)
+            return
+        if self._index is None:
+            self._index = KeyIndex(self.key_model.keys)
+        index, previous = self._index, self.query
+        # results of the previous search hold all its matches
+        complete = self.done and self.count <= self.LIMIT and self._searched is index
+        self.query, self._searched = query, index
+        if query.mode == "prefix":
+            count, keys = index.prefix(query.text, self.LIMIT)
+            self._set_results(keys, count, True)
+        elif complete and query.narrows(previous):
+            keys = [key for key in self.results if query.match(key)]
+            self._set_results(keys, len(keys), True)
+        else:
+            self._set_results([], 0, False)
+            self._search_next(query, index, 0)
+
+    def clear(self):
+        self.executor.cancel(self._group)
+        self._refresh_timer.stop()
+        self.query = self._searched = None
+        self._set_results([], 0, True)
+
+    def _set_results(self, keys, count, done):
+        self.beginResetModel()
+        self.results, self.count, self.done = keys, count, done
+        self.endResetModel()
+        self.searchProgress.emit(count, done)
+
+    def _search_next(self, query, index, start):
+        stop = start + self.STEP
+        self.executor.submit(
+            index.scan,
+            query,
+            start,
+            stop,
+            self.LIMIT - len(self.results),
+            callback=functools.partial(self._on_step, query, index, stop),
+            errback=self._on_search_error,
+            group=self._group,
+        )
+
+    def _on_step(self, query, index, stop, result):
+        count, keys = result
+        if keys:
+            first = len(self.results)
+            self.beginInsertRows(QModelIndex(), first, first + len(keys) - 1)
+            self.results.extend(keys)
+            self.endInsertRows()
+        self.count += count
+        self.done = stop >= index.nb_chunks
+        self.searchProgress.emit(self.count, self.done)
+        if not self.done:
+            self._search_next(query, index, stop)
+
+    def _on_search_error(self, error):
+        logging.error("error searching keys: %r", error)
+        self.done = True
+        self.searchError.emit(error)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.results)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        key = self.results[index.row()]
+        if role in {Qt.DisplayRole, Qt.EditRole, KeyNameRole}:
+            return key
+        elif role == Qt.DecorationRole:
+            return self.key_model._key_icon
+        elif role == Qt.ToolTipRole:
+            return self.key_model.key_tooltip(key)
+        elif role == NodeRole:
+            return Node(key, key=key)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsDragEnabled
+
+
 @ui_loadable
 class RedisTree(QMainWindow):
 
     addKey = Signal(object)
     currentChanged = Signal(object)
 
-    def __init__(self, redis, parent=None):
+    def __init__(self, redis, opts=None, parent=None):
         super(RedisTree, self).__init__(parent)
         self.load_ui()
         ui = self.ui
         self.redis = redis
-        self.source_model = RedisKeyModel(redis)
-        self.sort_filter_model = QSortFilterProxyModel()
-        self.sort_filter_model.setFilterRole(KeyNameRole)
-        self.sort_filter_model.setSourceModel(self.source_model)
-        ui.tree.setModel(self.sort_filter_model)
-        selection = ui.tree.selectionModel()
-        selection.currentChanged.connect(self._on_current_changed)
-        selection.selectionChanged.connect(self._on_selection_changed)
-        # TODO: fix bug search of type "bl04:" still gives no result
-        ui.filter_container.setVisible(False)
+        opts = opts or {}
+        self.source_model = RedisKeyModel(
+            redis,
+            filter=opts.get("filter") or "*",
+            sep=KeySplitter.from_string(opts.get("split_by") or ":"),
+        )
+        self.source_model.loadProgress.connect(self._on_load_progress)
+        self.source_model.loadFinished.connect(self._on_load_finished)
+        self.source_model.liveError.connect(self._on_live_error)
+        self.search_model = KeySearchModel(self.source_model, parent=self)
+        self.search_model.searchProgress.connect(self._on_search_progress)
+        self.search_model.searchError.connect(self._on_search_error)
+        ui.filter_mode.addItems(MODES)
+        ui.filter_count.setVisible(False)
+        self._set_view_model(self.source_model)
         add_menu = QMenu("Add")
         ui.add_string_action = add_menu.addAction("string")
         ui.add_list_action = add_menu.addAction("list")
@@ -237,65 +1135,313 @@ class RedisTree(QMainWindow):
         )
 
         ui.update_db_action.triggered.connect(self._on_update_db)
+        ui.live_action.toggled.connect(self._on_live_toggled)
+        ui.browse_action.toggled.connect(self.source_model.set_browse)
         ui.flush_db_action.triggered.connect(self._on_flush_db)
         ui.remove_key_action.triggered.connect(self._on_remove_key)
         ui.touch_key_action.triggered.connect(self._on_touch_key)
         ui.persist_key_action.triggered.connect(self._on_persist_key)
+        ui.expire_key_action.triggered.connect(self._on_expire_key)
+        ui.rename_folder_action.triggered.connect(self._on_rename_folder)
         ui.copy_key_action.triggered.connect(self._on_copy_key)
-        ui.filter_edit.textChanged.connect(self._on_filter_changed)
+        # search as the user types, once typing pauses
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(150)
+        self._search_timer.timeout.connect(self._search)
+        ui.filter_edit.textChanged.connect(self._search_timer.start)
+        ui.filter_mode.currentIndexChanged.connect(self._search_timer.start)
+
+        # prefetch metadata (tooltips) of the keys visible in the tree
+        self._prefetch_timer = QTimer(self)
+        self._prefetch_timer.setSingleShot(True)
+        self._prefetch_timer.setInterval(100)
+        self._prefetch_timer.timeout.connect(self._prefetch_visible)
+        schedule = self._prefetch_timer.start
+        ui.tree.verticalScrollBar().valueChanged.connect(schedule)
+        ui.tree.expanded.connect(schedule)
+        for model in (self.source_model, self.search_model):
+            model.rowsInserted.connect(schedule)
+            model.modelReset.connect(schedule)
+
+        # budget of the bulk operations (scans, pages, analyzers)
+        throttle = redis.throttle
+        ui.throttle_label = QLabel()
+        ui.max_ops = QSpinBox()
+        ui.max_ops.setRange(0, 1_000_000)
+        ui.max_ops.setSingleStep(100)
+        ui.max_ops.setSpecialValueText("no limit")
+        ui.max_ops.setSuffix(" ops/s")
+        ui.max_ops.setToolTip("Maximum commands per second of background operations")
+        ui.max_ops.setValue(throttle.rate)
+        ui.max_ops.valueChanged.connect(self._on_max_ops_changed)
+        self.statusBar().addPermanentWidget(ui.throttle_label)
+        self.statusBar().addPermanentWidget(ui.max_ops)
+        throttle.stateChanged.connect(self._on_throttle_state)
+
+        # progress of the bulk operation (at most one at a time)
+        self.bulk = None
+        ui.bulk_progress = QProgressBar()
+        ui.bulk_progress.setMaximumWidth(200)
+        ui.bulk_progress.setVisible(False)
+        ui.bulk_cancel = QToolButton()
+        ui.bulk_cancel.setIcon(QIcon.fromTheme("process-stop"))
+        ui.bulk_cancel.setToolTip("Cancel")
+        ui.bulk_cancel.setVisible(False)
+        ui.bulk_cancel.clicked.connect(self._on_bulk_cancel)
+        self.statusBar().addPermanentWidget(ui.bulk_progress)
+        self.statusBar().addPermanentWidget(ui.bulk_cancel)
+
+    def _set_view_model(self, model):
+        """Show the tree of keys or the flat list of search results"""
+        view = self.ui.tree
+        if view.model() is model:
+            return
+        view.setModel(model)
+        view.setRootIsDecorated(model is self.source_model)
+        selection = view.selectionModel()
+        selection.currentChanged.connect(self._on_current_changed)
+        selection.selectionChanged.connect(self._on_selection_changed)
+
+    def _visible_keys(self):
+        view = self.ui.tree
+        bottom = view.viewport().height()
+        index = view.indexAt(QPoint(1, 1))
+        keys = []
+        while index.isValid() and view.visualRect(index).top() < bottom:
+            node = index.data(NodeRole)
+            if node.is_key():
+                keys.append(node.key)
+            index = view.indexBelow(index)
+        return keys
+
+    def _prefetch_visible(self):
+        self.source_model.prefetch_meta(self._visible_keys())
 
     def contextMenuEvent(self, event):
         pass
 
-    def _get_selected_keys(self):
+    def _get_selected_nodes(self):
         selection = self.ui.tree.selectionModel()
-        indexes = (self.sort_filter_model.mapToSource(i) for i in selection.selectedIndexes())
-        nodes = (self.source_model.data(i, NodeRole) for i in indexes)
-        keys = tuple(node.key for node in nodes if node is not None and node.is_key())
-        return keys
+        nodes = (i.data(NodeRole) for i in selection.selectedIndexes())
+        return [node for node in nodes if node is not None]
+
+    def _get_selected_keys(self):
+        return tuple(node.key for node in self._get_selected_nodes() if node.is_key())
+
+    def _get_selected_folders(self):
+        """Full names of the selected folders"""
+        return tuple(
+            node.full_name
+            for node in self._get_selected_nodes()
+            if node.folder and not node.is_db()
+        )
+
+    def _search(self):
+        ui = self.ui
+        text = ui.filter_edit.text()
+        self.search_model.search(text, ui.filter_mode.currentText())
+        self._set_view_model(self.search_model if text else self.source_model)
+        ui.filter_count.setVisible(bool(text))
 
-    def _on_filter_changed(self, text):
-        if not text.endswith("*"):
-            text += "*"
-        self.sort_filter_model.setFilterWildcard(text)
+    def _on_search_progress(self, count, done):
+        text = f"{count} keys" if done else f"{count} keys..."
+        if count > self.search_model.LIMIT:
+            text += f" ({self.search_model.LIMIT} shown)"
+        self.ui.filter_count.setText(text)
+
+    def _on_search_error(self, error):
+        self.ui.filter_count.setText(f"error: {error}")
 
     def _on_current_changed(self, current, previous):
-        current = self.sort_filter_model.mapToSource(current)
-        node = self.source_model.data(current, Qt.UserRole)
-        self.currentChanged.emit(node)
+        self.currentChanged.emit(current.data(NodeRole))
 
     def _on_selection_changed(self, selected, deselected):
-        indexes = (self.sort_filter_model.mapToSource(i) for i in selected.indexes())
-        nodes = (self.source_model.data(i, NodeRole) for i in indexes)
-        nodes = [node for node in nodes if node is not None]
+        nodes = self._get_selected_nodes()
         nodes_selected = bool(nodes)
         ui = self.ui
         ui.remove_key_action.setEnabled(nodes_selected)
         ui.touch_key_action.setEnabled(nodes_selected)
         ui.persist_key_action.setEnabled(nodes_selected)
-        ui.copy_key_action.setEnabled(len(nodes) == 1)
+        ui.expire_key_action.setEnabled(nodes_selected)
+        ui.copy_key_action.setEnabled(len(nodes) == 1 and not nodes[0].is_db())
+        ui.rename_folder_action.setEnabled(len(self._get_selected_folders()) == 1)
+
+    def _on_load_progress(self, nb_keys):
+        self.statusBar().showMessage(f"Loading keys... ({nb_keys} found)")
+
+    def _on_load_finished(self):
+        self.statusBar().clearMessage()
+
+    def _on_max_ops_changed(self, rate):
+        self.redis.throttle.rate = rate
+
+    def _on_throttle_state(self, state):
+        label = self.ui.throttle_label
+        if not state.rate or state.latency is None:
+            label.clear()
+            return
+        text = f"{state.rate * state.factor:.0f} ops/s"
+        if state.busy:
+            text += " (server busy)"
+        label.setText(text)
+        label.setToolTip(
+            f"Background operations limited to {state.factor:.0%} of the budget\n"
+            f"Server latency: {state.latency * 1000:.1f} ms\n"
+            f"Other clients: {state.ops:.0f} ops/s\n"
+            f"Next operation in: {state.delay:.1f} s"
+        )
 
     def _on_flush_db(self):
         result = QMessageBox.question(
-            self, "Danger!",
-            "This action will delete all data from the current database.\n" \
-            "Are you absolutely sure?")
+            self,
+            "Danger!",
+            "This action will delete all data from the current database.\n"
+            "Are you absolutely sure?",
+        )
         if result == QMessageBox.Yes:
-            self.redis.flushdb()
-            self.source_model.refresh()
+            self.redis.executor.submit(self.redis.flushdb, callback=self._on_db_flushed)
+
+    def _on_live_toggled(self, live):
+        if not live:
+            self.source_model.set_live(False)
+            return
+        # the server must publish keyspace events: check it first
+        self.redis.executor.submit(
+            notify_flags,
+            self.redis,
+            callback=self._on_notify_flags,
+            errback=self._on_live_unavailable,
+        )
+
+    def _on_notify_flags(self, config):
+        if not self.ui.live_action.isChecked():
+            return
+        flags, missing = config
+        if not missing:
+            self.source_model.set_live(True)
+            return
+        result = QMessageBox.question(
+            self,
+            "Enable keyspace notifications?",
+            "Live mode needs the server keyspace notifications, which are "
+            f"disabled (notify-keyspace-events is {flags!r}).\n"
+            f"Enable them (CONFIG SET notify-keyspace-events {flags + missing!r})?"
+            "\n\nThis changes the server configuration for all its clients.",
+        )
+        if result != QMessageBox.Yes:
+            self._on_live_unavailable("keyspace notifications are disabled")
+            return
+        self.redis.executor.submit(
+            enable_notifications,
+            self.redis,
+            flags,
+            missing,
+            callback=self._on_notifications_enabled,
+            errback=self._on_live_unavailable,
+        )
+
+    def _on_notifications_enabled(self, _=None):
+        if self.ui.live_action.isChecked():
+            self.source_model.set_live(True)
+
+    def _on_live_unavailable(self, error):
+        self.ui.live_action.setChecked(False)
+        QMessageBox.warning(self, "Live mode unavailable", str(error))
+
+    def _on_live_error(self, error):
+        self.ui.live_action.setChecked(False)
+        self.statusBar().showMessage(f"Live mode stopped: {error}", 5000)
 
     def _on_update_db(self):
         self.source_model.refresh()
 
+    def _on_db_changed(self, _=None):
+        self.source_model.refresh()
+
+    def _on_db_flushed(self, _=None):
+        self.source_model.reset()
+
+    def _selection_size(self, keys, folders):
+        """Number of keys (loaded so far) of the selected keys and folders"""
+        model, splitter = self.source_model, self.source_model.splitter
+        return len(keys) + sum(folder_size(model.keys, f, splitter) for f in folders)
+
+    def _run_bulk(self, op, keys, folders, arg=None):
+        """Run a bulk operation on the keys and on the keys of the folders"""
+        if not keys and not folders:
+            return
+        if self.bulk is not None and self.bulk.is_running():
+            self.statusBar().showMessage("Another operation is running", 5000)
+            return
+        model = self.source_model
+        self.bulk = BulkOperation(
+            self.redis,
+            op,
+            keys=keys,
+            folders=folders,
+            splitter=model.splitter,
+            filter=model.filter,
+            arg=arg,
+            parent=self,
+        )
+        self.bulk.progress.connect(self._on_bulk_progress)
+        self.bulk.finished.connect(self._on_bulk_finished)
+        self.bulk.error.connect(self._on_bulk_error)
+        ui = self.ui
+        # folders may hold keys not loaded yet: the total is a guess
+        ui.bulk_progress.setRange(0, self._selection_size(keys, folders))
+        ui.bulk_progress.setValue(0)
+        ui.bulk_progress.setFormat(f"{op} %v")
+        ui.bulk_progress.setVisible(True)
+        ui.bulk_cancel.setVisible(True)
+        self.bulk.start()
+
+    def _on_bulk_progress(self, done):
+        progress = self.ui.bulk_progress
+        progress.setMaximum(max(done, progress.maximum()))
+        progress.setValue(done)
+
+    def _on_bulk_finished(self):
+        ui, bulk = self.ui, self.bulk
+        ui.bulk_progress.setVisible(False)
+        ui.bulk_cancel.setVisible(False)
+        text = f"{bulk.op}: {bulk.done} keys"
+        if bulk.failed:
+            text += f" ({bulk.failed} failed)"
+        self.statusBar().showMessage(text, 5000)
+
+    def _on_bulk_error(self, error):
+        QMessageBox.warning(self, f"Error running {self.bulk.op}", repr(error))
+
+    def _on_bulk_cancel(self):
+        if self.bulk is not None:
+            self.bulk.cancel()
+
     def _on_touch_key(self):
-        keys = self._get_selected_keys()
-        if keys:
-            self.redis.touch(*keys)
+        self._run_bulk("touch", self._get_selected_keys(), self._get_selected_folders())
 
     def _on_persist_key(self):
-        keys = self._get_selected_keys()
-        for key in keys:
-            self.redis.persist(key)
+        self._run_bulk(
+            "persist", self._get_selected_keys(), self._get_selected_folders()
+        )
+
+    def _on_expire_key(self):
+        ttl, ok = QInputDialog.getInt(
+            self, "Expire", "Time to live (s)", 60, 1, 2**31 - 1
+        )
+        if ok:
+            self._run_bulk(
+                "expire", self._get_selected_keys(), self._get_selected_folders(), ttl
+            )
+
+    def _on_rename_folder(self):
+        old = self._get_selected_folders()[0]
+        new, ok = QInputDialog.getText(
+            self, f"Rename {old!r} to...", "New folder name", text=old
+        )
+        if ok and new and new != old:
+            self._run_bulk("rename", (), (old,), (old, new))
 
     def _on_add_key(self, dtype):
         value = None
@@ -311,21 +1457,33 @@ class RedisTree(QMainWindow):
         self.addKey.emit(item)
 
     def _on_remove_key(self):
-        keys = self._get_selected_keys()
-        if keys:
-            self.redis.delete(*keys)
+        keys, folders = self._get_selected_keys(), self._get_selected_folders()
+        if folders:
+            size = self._selection_size(keys, folders)
+            result = QMessageBox.question(
+                self,
+                "Are you sure?",
+                f"Remove {len(folders)} folder(s): {size} keys (at least)?",
+            )
+            if result != QMessageBox.Yes:
+                return
+        # UNLINK frees memory in the background (redis >= 4)
+        op = "unlink" if self.redis.version >= (4,) else "delete"
+        self._run_bulk(op, keys, folders)
         self.ui.tree.clearSelection()
 
     def _on_copy_key(self):
-        keys = self._get_selected_keys()
-        assert len(keys) == 1
-        src = keys[0]
-        dst, ok = QInputDialog.getText(self, f"Copy {src!r} to...", "New key")
-        if ok:
-            # redis.copy() only >= 6.2
-            #self.redis.copy(src, dst)
-            self.redis[dst] = self.redis[src].value
-            self.source_model.refresh()
+        node = self._get_selected_nodes()[0]
+        name = node.key if node.is_key() else node.full_name
+        copy = CopyDialog.get_copy(self.redis, name, parent=self)
+        if copy is None:
+            return
+        target, new_name, replace = copy
+        if not new_name or (target is self.redis and new_name == name):
+            return
+        keys = (name,) if node.is_key() else ()
+        folders = (name,) if node.folder else ()
+        self._run_bulk("copy", keys, folders, ((name, new_name), target, replace))
 
 
 def main():
@@ -359,7 +1517,7 @@ def main():
     application = QApplication(sys.argv)
     window = RedisTree()
     if kwargs:
-        r = QRedis(**kwargs)
+        r = get_redis(**kwargs)
         window.add_redis(r)
     window.show()
     sys.exit(application.exec_())
@@ -1,5 +1,7 @@
 import os
+import re
 import sys
+import time
 import textwrap
 import collections
 
@@ -13,22 +15,65 @@ Client Name: {name}"""
 
 def toolTip(item):
     value = textwrap.shorten(str(item.value), 80)
-    return f"""\
+    text = f"""\
 name: {item.key}
 type: {item.type}
-TTL: {item.ttl}
-Value: {value}"""
+TTL: {item.ttl}"""
+    if item.encoding is not None:
+        text += f"\nEncoding: {item.encoding}"
+    if item.memory is not None:
+        text += f"\nMemory: {item.memory} bytes"
+    return text + f"\nValue: {value}"
 
 
-KeyItem = collections.namedtuple("KeyItem", "redis key type ttl value")
+KeyItem = collections.namedtuple("KeyItem", "redis key type ttl value memory encoding")
+# memory and encoding are optional (namedtuple defaults= needs python >= 3.7)
+KeyItem.__new__.__defaults__ = (None, None)
 KeyItem.toolTip = toolTip
 
 
+SIZE_UNITS = {
+    "string": "bytes",
+    "list": "items",
+    "hash": "fields",
+    "set": "members",
+    "zset": "members",
+    "stream": "entries",
+}
+
+
+def meta_toolTip(meta):
+    ttl = meta.ttl
+    if ttl > 0:
+        # TTL was measured when the metadata was fetched
+        ttl = max(0, round(ttl - (time.monotonic() - meta.time)))
+    value = textwrap.shorten(str(meta.preview), 80)
+    units = SIZE_UNITS.get(meta.type, "")
+    return f"""\
+name: {meta.key}
+type: {meta.type}
+TTL: {ttl}
+Size: {meta.size} {units}
+Value: {value}"""
+
+
+KeyMeta = collections.namedtuple("KeyMeta", "key type ttl size preview time")
+KeyMeta.toolTip = meta_toolTip
+
+
+def human_size(nbytes):
+    """Short human readable size (ex: 1.5 MiB)"""
+    for unit in ("bytes", "KiB", "MiB", "GiB"):
+        if abs(nbytes) < 1024 or unit == "GiB":
+            break
+        nbytes /= 1024
+    return f"{nbytes} {unit}" if unit == "bytes" else f"{nbytes:.1f} {unit}"
+
+
 def redis_str(redis):
     info = redis.connection_pool.connection_kwargs
     db = info["db"]
-    cid = redis.client_id()
-    cname = redis.client_getname()
+    cid, cname = redis.identity
     if "path" in info:  # unix socket
         addr = info["path"]
     elif "host" in info:
@@ -55,16 +100,81 @@ def redis_value(redis, key, dtype=None):
     return value
 
 
+class KeySplitter:
+    """
+    Splits keys at any of the given separators. Each separator is kept at
+    the beginning of the part which follows it, so that joining the parts
+    gives the key back (ex: "a:b.c" -> ["a", ":b", ".c"]).
+
+    *separators* is either a string where each character is a separator
+    or a sequence of (possibly multi-character) separators. Where two
+    separators match at the same position the longest one wins.
+    """
+
+    def __init__(self, separators=".:"):
+        separators = sorted(set(separators), key=len, reverse=True)
+        if not separators or "" in separators:
+            raise ValueError("need at least one non empty separator")
+        #: separators, longest first
+        self.separators = tuple(separators)
+        #: separators which don't start with another separator
+        self.prefixes = tuple(
+            sep
+            for sep in separators
+            if not any(sep != other and sep.startswith(other) for other in separators)
+        )
+        #: True if the end of a separator can be the start of another one
+        #: ("-:" and ":"): a key then can't be split by looking at a part only
+        self.overlapping = any(
+            sep[i:].startswith(other) or other.startswith(sep[i:])
+            for sep in separators
+            for other in separators
+            for i in range(1, len(sep))
+        )
+        self.regex = re.compile("|".join(re.escape(sep) for sep in separators))
+        if all(len(sep) == 1 for sep in separators):
+            # character classes are much faster than a "tempered" dot
+            chars = re.escape("".join(separators))
+            sep, other = f"[{chars}]", f"[^{chars}]*"
+        else:
+            sep = f"(?:{self.regex.pattern})"
+            other = f"(?:(?!{self.regex.pattern}).)*"
+        # first part (maybe empty) then one match per separator
+        self._parts = re.compile(f"^{other}|{sep}{other}", re.DOTALL)
+
+    @classmethod
+    def from_string(cls, text):
+        """
+        Separators from user text: white space separated separators if
+        there is white space, otherwise each character is a separator
+        """
+        tokens = text.split()
+        if len(tokens) > 1:
+            return cls(tokens)
+        return cls(text.strip())
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.separators!r})"
+
+    def split(self, key):
+        return self._parts.findall(key)
+
+    def search(self, key, pos=0):
+        """First separator at or after *pos* (re.Match or None)"""
+        return self.regex.search(key, pos)
+
+    def match(self, key, pos=0):
+        """Separator starting exactly at *pos* (re.Match or None)"""
+        return self.regex.match(key, pos)
+
+
+def glob_escape(text):
+    """Escape the redis glob-style pattern special characters"""
+    return "".join("\\" + c if c in "*?[]\\" else c for c in text)
+
+
 def redis_key_split(key, chars="."):
-    result, curr = [], ""
-    for char in key:
-        if char in chars:
-            result.append(curr)
-            curr = ""
-        curr += char
-    if curr:
-        result.append(curr)
-    return result
+    return KeySplitter(chars).split(key)
 
 
 __startup_cwd = os.getcwd()
@@ -8,7 +8,8 @@ from qtpy.QtWidgets import (
 )
 from .util import restart, redis_str
 from .qutil import ui_loadable
-from .redis import QRedis
+from .connection import get_redis
+from .codec import CODECS, force_codec
 from .panel import RedisPanel
 from .dialog import AboutDialog, OpenRedisDialog
 
@@ -58,7 +59,7 @@ class RedisWindow(QMainWindow):
 
     def add_redis_panel(self, redis, opts):
         name, _ = redis_str(redis)
-        panel = RedisPanel(redis)
+        panel = RedisPanel(redis, opts)
         window = self.ui.mdi.addSubWindow(panel)
         window.setAttribute(Qt.WA_DeleteOnClose)
         window.setWindowTitle(name)
@@ -79,7 +80,33 @@ def main():
     parser.add_argument("-n", "--db", type=int, help="Database number")
     parser.add_argument("--name", default="qredis", help="Client name")
     parser.add_argument("-f", "--key-filter", default="*", help="Key filter")
-    parser.add_argument("--key-split", default=".:", help="Key splitter")
+    parser.add_argument(
+        "--key-split",
+        default=".:",
+        help="Key separators: each character is a separator unless white "
+        "space separated (ex: '::' '->')",
+    )
+    parser.add_argument(
+        "--codec",
+        action="append",
+        default=[],
+        metavar="PREFIX=CODEC",
+        help="decode keys starting with PREFIX with CODEC (ex: stats:=msgpack)",
+    )
+    parser.add_argument(
+        "--max-ops",
+        type=int,
+        default=0,
+        help="maximum commands per second of background operations "
+        "(key scans, value pages, analyzers) [default: no limit]",
+    )
+    parser.add_argument(
+        "--busy-ops",
+        type=int,
+        default=0,
+        help="slow down background operations while the other clients run more "
+        "commands per second than this (requires --max-ops)",
+    )
     parser.add_argument(
         "--log-level",
         default="WARNING",
@@ -92,6 +119,14 @@ def main():
     level = getattr(logging, args.log_level.upper())
     logging.basicConfig(format=fmt, level=level)
 
+    for codec in args.codec:
+        prefix, _, name = codec.rpartition("=")
+        try:
+            force_codec(prefix, name)
+        except KeyError:
+            names = ", ".join(CODECS.codecs)
+            parser.error(f"--codec {codec}: unknown codec {name!r} (one of: {names})")
+
     kwargs = dict(client_name=args.name)
     if args.host is not None:
         kwargs["host"] = args.host
@@ -105,7 +140,9 @@ def main():
     application = QApplication(sys.argv)
     window = RedisWindow()
     if len(kwargs) > 1:
-        r = QRedis(**kwargs)
+        r = get_redis(**kwargs)
+        r.throttle.rate = args.max_ops
+        r.throttle.busy_ops = args.busy_ops
         window.add_redis_panel(r, opts)
     window.show()
     sys.exit(application.exec_())
@@ -0,0 +1,133 @@
+"""Redis I/O executor: runs commands outside the Qt GUI thread"""
+
+import queue
+import logging
+import threading
+
+from qtpy.QtCore import QObject, QTimer, Signal
+
+
+class Task:
+    """A unit of work submitted to an :class:`Executor`"""
+
+    __slots__ = ["func", "args", "kwargs", "callback", "errback", "group", "cancelled"]
+
+    def __init__(self, func, args, kwargs, callback=None, errback=None, group=None):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.callback = callback
+        self.errback = errback
+        self.group = group
+        self.cancelled = False
+
+    def __repr__(self):
+        name = getattr(self.func, "__name__", repr(self.func))
+        return f"Task({name}, group={self.group!r}, cancelled={self.cancelled})"
+
+    def cancel(self):
+        self.cancelled = True
+
+    def __call__(self):
+        return self.func(*self.args, **self.kwargs)
+
+
+class Executor(QObject):
+    """
+    Runs callables on a pool of worker threads (one by default, so commands
+    sent to the same connection are executed in submission order).
+
+    Results are delivered back in the thread of the executor (the Qt GUI
+    thread) through the *taskDone* signal and the optional task callbacks.
+
+    Tasks submitted with a *group* supersede any pending or running task of
+    the same group: the older task is cancelled and its result discarded.
+
+    Bulk tasks are held back as long as the *throttle* (a
+    :class:`~qredis.throttle.Throttle`) asks for it, so they may run
+    after tasks submitted later.
+    """
+
+    taskDone = Signal(object, object, object)
+    pendingChanged = Signal(int)
+
+    def __init__(self, nb_workers=1, name="redis-io", throttle=None, parent=None):
+        super().__init__(parent)
+        self.throttle = throttle
+        self._tasks = queue.Queue()
+        self._groups = {}
+        self._pending = 0
+        self.taskDone.connect(self._on_task_done)
+        self._workers = [
+            threading.Thread(target=self._run, name=f"{name}-{i}", daemon=True)
+            for i in range(nb_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def _run(self):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                break
+            if task.cancelled:
+                self.taskDone.emit(task, None, None)
+                continue
+            try:
+                result = task()
+            except Exception as error:
+                self.taskDone.emit(task, None, error)
+            else:
+                self.taskDone.emit(task, result, None)
+
+    def _on_task_done(self, task, result, error):
+        self._pending -= 1
+        self.pendingChanged.emit(self._pending)
+        if task.group is not None and self._groups.get(task.group) is task:
+            del self._groups[task.group]
+        if task.cancelled:
+            return
+        if error is None:
+            if task.callback is not None:
+                task.callback(result)
+        elif task.errback is not None:
+            task.errback(error)
+        else:
+            logging.error("error running %r", task, exc_info=error)
+
+    @property
+    def pending(self):
+        """number of tasks submitted but not yet delivered"""
+        return self._pending
+
+    def submit(
+        self, func, *args, callback=None, errback=None, group=None, bulk=False, **kwargs
+    ):
+        """
+        Schedule *func(\\*args, \\*\\*kwargs)* to run on a worker thread.
+        *callback(result)* or *errback(error)* are called in the GUI thread.
+        *bulk* tasks are delayed by the throttle (if any).
+        Returns the :class:`Task` which can be cancelled.
+        """
+        task = Task(func, args, kwargs, callback, errback, group)
+        if group is not None:
+            self.cancel(group)
+            self._groups[group] = task
+        self._pending += 1
+        self.pendingChanged.emit(self._pending)
+        delay = self.throttle.delay() if bulk and self.throttle is not None else 0
+        if delay > 0:
+            QTimer.singleShot(int(delay * 1000), lambda: self._tasks.put(task))
+        else:
+            self._tasks.put(task)
+        return task
+
+    def cancel(self, group):
+        """Cancel the pending task of the given group (if any)"""
+        task = self._groups.pop(group, None)
+        if task is not None:
+            task.cancel()
+
+    def shutdown(self):
+        for _ in self._workers:
+            self._tasks.put(None)
@@ -0,0 +1,26 @@
+import msgpack
+
+from qredis.codec import CodecRegistry, _default_codecs
+
+
+def test_single_byte_text_after_msgpack_sibling():
+    codecs = CodecRegistry(_default_codecs())
+    codec, text = codecs.detect(msgpack.packb({"name": "bob"}), "user:2")
+    assert codec.name == "msgpack"
+    assert codecs.detect(b"7", "user:3") == (codecs["utf-8"], "7")
+    assert codecs.decode(b"b", "user:4") == "b"
+    assert codecs.decode(b"y", "user:4") == "y"
+
+
+def test_cached_codec_is_used_when_the_chain_rejects_the_value():
+    codecs = CodecRegistry(_default_codecs())
+    codecs.detect(msgpack.packb([1, 2]), "stats:1")
+    codec, text = codecs.detect(msgpack.packb([3, 4]), "stats:2")
+    assert codec.name == "msgpack"
+    assert text == "[3, 4]"
+
+
+def test_forced_codec_falls_back_to_detection():
+    codecs = CodecRegistry(_default_codecs())
+    codecs.force("p:", "pickle")
+    assert codecs.decode(b"plain text", "p:1") == "plain text"
@@ -0,0 +1,42 @@
+from qredis.redis import CollectionEdit, EDIT_COMMANDS, _Commands
+
+
+def commands(dtype, original, rows, raw):
+    edit = CollectionEdit(dtype, original, rows, len(original), True, raw)
+    queued = _Commands()
+    EDIT_COMMANDS[dtype][0](queued, "key", edit, None)
+    return [(name, args[1:], kwargs) for name, args, kwargs in queued.queued]
+
+
+def test_set_members_are_removed_by_raw_value():
+    original = [("(1, 2)",), ("a",)]
+    raw = [b"\x80\x04K\x01K\x02\x86\x94.", b"a"]
+    rows = [(1, ("b",))]
+    assert commands("set", original, rows, raw) == [
+        ("srem", (b"\x80\x04K\x01K\x02\x86\x94.", b"a"), {}),
+        ("sadd", ("b",), {}),
+    ]
+
+
+def test_hash_fields_are_addressed_by_raw_value():
+    original = [("1", "x"), ("2", "y")]
+    raw = [b"\x80\x04K\x01.", b"\x80\x04K\x02."]
+    rows = [(0, ("1", "X"))]
+    assert commands("hash", original, rows, raw) == [
+        ("hdel", (b"\x80\x04K\x02.",), {}),
+        ("hset", (), {"mapping": {b"\x80\x04K\x01.": "X"}}),
+    ]
+
+
+def test_zset_members_are_addressed_by_raw_value():
+    original = [("1", 1.0), ("2", 2.0)]
+    raw = [b"\x80\x04K\x01.", b"\x80\x04K\x02."]
+    rows = [(0, ("1", 5.5)), (None, ("3", 3.0))]
+    assert commands("zset", original, rows, raw) == [
+        ("zrem", (b"\x80\x04K\x02.",), {}),
+        ("zadd", ({b"\x80\x04K\x01.": 5.5, "3": 3.0},), {}),
+    ]
+
+
+def test_unknown_raw_value_falls_back_to_the_displayed_one():
+    assert commands("set", [("a",)], [], [None]) == [("srem", ("a",), {})]
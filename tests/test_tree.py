@@ -0,0 +1,117 @@
+import random
+
+import pytest
+
+from qredis.tree import children, sorted_diff
+from qredis.util import KeySplitter
+
+SEPARATORS = [":", ".:", ["::", ":"], ["-:", ":"], ["::", ":", "."], ":: :"]
+
+
+def splitter_for(separators):
+    if isinstance(separators, str):
+        return KeySplitter.from_string(separators)
+    return KeySplitter(separators)
+
+
+def naive_split(key, separators):
+    """Split one character at a time, the longest separator winning"""
+    separators = sorted(separators, key=len, reverse=True)
+    parts, i = [""], 0
+    while i < len(key):
+        sep = next((sep for sep in separators if key.startswith(sep, i)), None)
+        if sep is None:
+            parts[-1] += key[i]
+            i += 1
+        else:
+            parts.append(sep)
+            i += len(sep)
+    return parts
+
+
+def naive_children(keys, prefix, splitter, top=False):
+    depth = 0 if top else len(splitter.split(prefix))
+    result = {}
+    for key in keys:
+        parts = splitter.split(key)
+        if len(parts) <= depth or "".join(parts[:depth]) != prefix:
+            continue
+        entry = result.setdefault(parts[depth], [None, False])
+        if len(parts) == depth + 1:
+            entry[0] = key
+        else:
+            entry[1] = True
+    return sorted((name, key, folder) for name, (key, folder) in result.items())
+
+
+def random_keys(rng, n=300, chars="ab:-.", size=6):
+    return sorted(
+        {
+            "".join(rng.choice(chars) for _ in range(rng.randint(0, size)))
+            for _ in range(n)
+        }
+    )
+
+
+KEYS = [
+    "",
+    ":",
+    "::",
+    ":a",
+    "a",
+    "a:",
+    "a::",
+    "a::z",
+    "a:::z",
+    "a:b",
+    "a:b:c",
+    "a:b.c",
+    "a-:b",
+    "a-b",
+    "ab:c",
+    "a.b",
+]
+
+
+@pytest.mark.parametrize("separators", SEPARATORS)
+def test_splitter_matches_naive_split(separators):
+    splitter = splitter_for(separators)
+    rng = random.Random(1)
+    for key in KEYS + random_keys(rng):
+        parts = splitter.split(key)
+        assert parts == naive_split(key, splitter.separators), key
+        assert "".join(parts) == key
+
+
+def test_longest_separator_wins():
+    splitter = KeySplitter(["::", ":"])
+    assert splitter.split("a:::z") == ["a", "::", ":z"]
+    assert splitter.split("a::z") == ["a", "::z"]
+    assert splitter.split(":a:") == ["", ":a", ":"]
+
+
+@pytest.mark.parametrize("separators", SEPARATORS)
+def test_children_matches_naive_children(separators):
+    splitter = splitter_for(separators)
+    rng = random.Random(2)
+    for keys in (sorted(KEYS), random_keys(rng), random_keys(rng, chars="a:")):
+        assert children(keys, "", splitter, top=True) == naive_children(
+            keys, "", splitter, top=True
+        )
+        prefixes = {
+            "".join(parts[:depth])
+            for parts in map(splitter.split, keys)
+            for depth in range(1, len(parts))
+        }
+        for prefix in sorted(prefixes):
+            expected = naive_children(keys, prefix, splitter)
+            assert children(keys, prefix, splitter) == expected, prefix
+
+
+def test_sorted_diff_matches_set_difference():
+    rng = random.Random(3)
+    for _ in range(50):
+        old, new = random_keys(rng, 40, "abc", 3), random_keys(rng, 40, "abc", 3)
+        removed, added = sorted_diff(old, new)
+        assert removed == sorted(set(old) - set(new))
+        assert added == sorted(set(new) - set(old))